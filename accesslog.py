@@ -0,0 +1,116 @@
+"""
+Access log ringkas untuk analisis traffic dan replay (lihat replay.py).
+
+Satu baris per request, dipisah tab:
+
+    ts  method  route  target  status  latency_ms  cache
+
+- ts: unix time (detik, 3 desimal)
+- route: template route, mis. /series/{slug}/chapters
+- target: path + query string asli (cukup untuk replay)
+- cache: hasil lookup cache selama request, mis. "out:m,resp:h"
+  (h = hit, m = miss, w = menunggu fill yang sedang jalan), "-" kalau tidak ada
+"""
+
+import time
+
+from cache import cache_outcomes
+
+
+FIELDS = ("ts", "method", "route", "target", "status", "latency_ms", "cache")
+
+
+class AccessLog:
+    """File log buffered, di-flush tiap `flush_every` baris dan saat close"""
+
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = flush_every
+        self.file = None
+        self.pending = 0
+
+    def write(self, scope, status: int, latency: float, outcomes: list):
+
+        route = scope.get("route")
+        target = scope["path"]
+
+        if scope.get("query_string"):
+            target += "?" + scope["query_string"].decode("latin-1")
+
+        line = "\t".join((
+            f"{time.time():.3f}",
+            scope["method"],
+            getattr(route, "path", "-"),
+            target,
+            str(status),
+            f"{latency * 1000:.2f}",
+            ",".join(outcomes) or "-",
+        ))
+
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+
+        self.file.write(line + "\n")
+        self.pending += 1
+
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+        self.pending = 0
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+        self.file = None
+
+
+class AccessLogMiddleware:
+    """ASGI middleware: catat status, latency dan hasil cache tiap request HTTP"""
+
+    def __init__(self, app, log: AccessLog):
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope, receive, send):
+
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+        outcomes = []
+        token = cache_outcomes.set(outcomes)
+
+        async def send_wrapper(message):
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+
+        finally:
+            cache_outcomes.reset(token)
+            self.log.write(scope, status, time.perf_counter() - start, outcomes)
+
+
+def parse_line(line: str) -> dict | None:
+    parts = line.rstrip("\n").split("\t")
+
+    if len(parts) != len(FIELDS):
+        return None
+
+    entry = dict(zip(FIELDS, parts))
+    entry["ts"] = float(entry["ts"])
+    entry["status"] = int(entry["status"])
+    entry["latency_ms"] = float(entry["latency_ms"])
+
+    return entry
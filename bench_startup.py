@@ -0,0 +1,93 @@
+"""
+Benchmark cold start: waktu import main.py, startup lifespan, dan latency
+request pertama (pakai fake upstream, tanpa network).
+
+    python bench_startup.py            # 10 run
+    python bench_startup.py -n 30 --json
+
+Setiap run jalan di proses Python baru supaya import benar-benar cold.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+# Dijalankan di subprocess; print satu baris JSON berisi timing (detik)
+PROBE = r"""
+import asyncio, json, time
+
+t0 = time.perf_counter()
+import main
+import fake_upstream
+t_import = time.perf_counter() - t0
+
+import httpx
+
+async def run():
+    app = main.create_app(transport=fake_upstream.transport())
+
+    t1 = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        t_startup = time.perf_counter() - t1
+
+        asgi = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=asgi, base_url="http://bench") as c:
+            timings = {}
+            for name, path in [
+                ("first_series", "/series?take=20"),
+                ("first_detail", "/series/series-1"),
+                ("first_chapters", "/series/series-1/chapters"),
+                ("warm_series", "/series?take=20"),
+            ]:
+                t = time.perf_counter()
+                r = await c.get(path)
+                assert r.status_code == 200, (path, r.status_code)
+                timings[name] = time.perf_counter() - t
+
+    return {"import": t_import, "startup": t_startup, **timings}
+
+print(json.dumps(asyncio.run(run())))
+"""
+
+
+def probe() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--runs", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="output JSON (untuk tracking di CI)")
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.runs)]
+
+    summary = {}
+
+    for key in runs[0]:
+        values = sorted(r[key] * 1000 for r in runs)
+        summary[key] = {
+            "median_ms": round(statistics.median(values), 2),
+            "max_ms": round(values[-1], 2),
+        }
+
+    if args.json:
+        print(json.dumps({"runs": args.runs, "results": summary}, indent=2))
+        return
+
+    print(f"{'metric':<16}{'median ms':>12}{'max ms':>12}   ({args.runs} runs)")
+    for key, s in summary.items():
+        print(f"{key:<16}{s['median_ms']:>12}{s['max_ms']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,632 @@
+"""
+Cache backend untuk response upstream dan gambar proxy.
+
+Backend dipilih lewat env:
+
+    CACHE_BACKEND=memory   (default) cache per proses
+    CACHE_BACKEND=sqlite   dipakai bersama semua worker di satu host
+                           CACHE_URL=/tmp/komikcast-cache.sqlite3
+    CACHE_BACKEND=redis    dipakai bersama semua instance (protokol Redis)
+                           CACHE_URL=redis://:password@host:6379/0
+
+CACHE_MAX_BYTES membatasi total ukuran value untuk backend memory
+(default 256 MB) dan sqlite (default 512 MB). Untuk redis batasnya diatur
+di server (maxmemory). `python fake_redis.py` menjalankan stand-in lokal.
+
+Semua value berupa bytes. `Cache.get_or_fill()` memastikan hanya satu
+pengisi per key: di dalam proses lewat Future, antar worker lewat lock
+di backend (SET NX).
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Awaitable, Callable
+from urllib.parse import urlparse
+
+
+# ====================================
+# BACKEND INTERFACE
+# ====================================
+
+class CacheBackend:
+    """Interface backend. Semua method async supaya backend jaringan bisa dipakai."""
+
+    async def get(self, key: str) -> bytes | None:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def acquire(self, key: str, ttl: float) -> bool:
+        """Ambil lock `key` selama `ttl` detik. False kalau dipegang pihak lain."""
+        raise NotImplementedError
+
+    async def release(self, key: str):
+        await self.delete(key)
+
+    async def close(self):
+        pass
+
+
+# ====================================
+# IN-MEMORY BACKEND
+# ====================================
+
+class MemoryBackend(CacheBackend):
+    """LRU + TTL per proses, dibatasi jumlah entry dan total bytes"""
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self.entries.get(key)
+
+        if entry is None:
+            return None
+
+        value, expires = entry
+
+        if expires < time.monotonic():
+            self._pop(key)
+            return None
+
+        self.entries.move_to_end(key)
+
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._pop(key)
+
+        self.entries[key] = (value, time.monotonic() + ttl)
+        self.size += len(value)
+
+        while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+            self._pop(next(iter(self.entries)))
+
+    async def delete(self, key: str):
+        self._pop(key)
+
+    async def acquire(self, key: str, ttl: float) -> bool:
+        if await self.get(key) is not None:
+            return False
+
+        await self.set(key, b"1", ttl)
+        return True
+
+    def _pop(self, key: str):
+        entry = self.entries.pop(key, None)
+
+        if entry is not None:
+            self.size -= len(entry[0])
+
+
+# ====================================
+# SQLITE BACKEND (SHARED PER HOST)
+# ====================================
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cache di file SQLite (WAL + mmap) yang dibaca bersama oleh semua
+    worker uvicorn di host yang sama. Semua query jalan di satu thread
+    khusus: lock dari worker lain (busy timeout) dan write gambar besar
+    tidak menahan event loop. Total ukuran value dibatasi `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        path: str = "/tmp/komikcast-cache.sqlite3",
+        max_entries: int = 50000,
+        max_bytes: int = 512 * 1024 * 1024,
+    ):
+        import sqlite3
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.writes = 0
+        self.written = 0
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix="sqlite-cache")
+        self.db = sqlite3.connect(path, timeout=1.0, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA mmap_size=268435456")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires REAL)"
+        )
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self._run(self._set, key, value, ttl)
+
+    async def delete(self, key: str):
+        await self._run(self.db.execute, "DELETE FROM cache WHERE key = ?", (key,))
+
+    async def acquire(self, key: str, ttl: float) -> bool:
+        return await self._run(self._acquire, key, ttl)
+
+    async def close(self):
+        await self._run(self.db.close)
+        self.executor.shutdown(wait=False)
+
+    # dijalankan di thread sqlite
+
+    def _get(self, key: str) -> bytes | None:
+        row = self.db.execute(
+            "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+
+        return row[0] if row else None
+
+    def _set(self, key: str, value: bytes, ttl: float):
+        self.db.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl),
+        )
+
+        self.writes += 1
+        self.written += len(value)
+
+        # bersihkan entry expired / kelebihan sesekali, bukan tiap write
+        if self.writes % 1000 == 0 or self.written > self.max_bytes // 16:
+            self._evict()
+
+    def _acquire(self, key: str, ttl: float) -> bool:
+        now = time.time()
+
+        self.db.execute("DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now))
+
+        cur = self.db.execute(
+            "INSERT OR IGNORE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, b"1", now + ttl),
+        )
+
+        return cur.rowcount == 1
+
+    def _evict(self):
+        self.written = 0
+
+        self.db.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        self.db.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires LIMIT "
+            "max(0, (SELECT count(*) FROM cache) - ?))",
+            (self.max_entries,),
+        )
+        # entry yang paling cepat expired dibuang sampai total bytes di bawah batas
+        self.db.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM (SELECT key, sum(length(value)) "
+            "OVER (ORDER BY expires DESC, key) AS total FROM cache) WHERE total > ?)",
+            (self.max_bytes,),
+        )
+
+
+# ====================================
+# REDIS-PROTOCOL BACKEND
+# ====================================
+
+class RedisError(Exception):
+    pass
+
+
+class RedisBackend(CacheBackend):
+    """
+    Client RESP2 minimal (GET/SET/DEL) di atas asyncio stream, jadi tidak
+    butuh package redis. Jalan dengan server apa pun yang bicara protokol
+    Redis (Redis, Valkey, KeyDB, atau stand-in lokal).
+    """
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0", timeout: float = 1.0):
+        parsed = urlparse(url)
+
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        self.lock = asyncio.Lock()
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.command(b"GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.command(b"SET", key, value, b"PX", max(int(ttl * 1000), 1))
+
+    async def delete(self, key: str):
+        await self.command(b"DEL", key)
+
+    async def acquire(self, key: str, ttl: float) -> bool:
+        return await self.command(b"SET", key, b"1", b"NX", b"PX", max(int(ttl * 1000), 1)) == b"OK"
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+        self.reader = self.writer = None
+
+    async def command(self, *args):
+        async with self.lock:
+
+            try:
+
+                if self.writer is None:
+                    await self._connect()
+
+                return await asyncio.wait_for(self._roundtrip(args), self.timeout)
+
+            except RedisError:
+                # error dari server: reply sudah terbaca utuh, koneksi tetap sinkron
+                raise
+
+            except BaseException:
+                # koneksi rusak, timeout, atau task dibatalkan di tengah round trip:
+                # reply yang belum terbaca akan tertukar dengan command berikutnya,
+                # jadi koneksi ditutup dan request berikutnya connect ulang
+                await self.close()
+                raise
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+
+        try:
+
+            if self.password:
+                await self._roundtrip((b"AUTH", self.password))
+
+            if self.db:
+                await self._roundtrip((b"SELECT", self.db))
+
+        except BaseException:
+            # AUTH / SELECT gagal: jangan simpan koneksi setengah jadi
+            await self.close()
+            raise
+
+    async def _roundtrip(self, args):
+        self.writer.write(encode_command(args))
+        await self.writer.drain()
+        return await read_reply(self.reader)
+
+
+def encode_command(args) -> bytes:
+    out = [b"*%d\r\n" % len(args)]
+
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+
+        out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+
+    return b"".join(out)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    line = await reader.readuntil(b"\r\n")
+    kind, body = line[:1], line[1:-2]
+
+    if kind == b"+":
+        return body
+
+    if kind == b"-":
+        raise RedisError(body.decode(errors="replace"))
+
+    if kind == b":":
+        return int(body)
+
+    if kind == b"$":
+        size = int(body)
+
+        if size < 0:
+            return None
+
+        data = await reader.readexactly(size + 2)
+        return data[:-2]
+
+    if kind == b"*":
+        size = int(body)
+        return None if size < 0 else [await read_reply(reader) for _ in range(size)]
+
+    raise RedisError(f"Unknown reply type: {line!r}")
+
+
+# ====================================
+# CACHE + SINGLE-FLIGHT
+# ====================================
+
+# Diisi access log per request (lihat accesslog.py): list "namespace:h|m|w"
+cache_outcomes: ContextVar[list | None] = ContextVar("cache_outcomes", default=None)
+
+
+def record_outcome(namespace: str, outcome: str):
+    outcomes = cache_outcomes.get()
+
+    if outcomes is not None:
+        outcomes.append(f"{namespace}:{outcome}")
+
+
+class Cache:
+    """
+    Cache dengan namespace di atas backend. Error backend diperlakukan
+    sebagai miss supaya cache yang down tidak membuat API ikut down.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str, lock_ttl: float = 10.0):
+        self.backend = backend
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl
+        self.inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            return await self.backend.get(self.key(key))
+        except Exception:
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        try:
+            await self.backend.set(self.key(key), value, ttl)
+        except Exception:
+            pass
+
+    async def get_or_fill(
+        self,
+        key: str,
+        ttl: float,
+        fill: Callable[[], Awaitable[bytes]],
+        cacheable: Callable[[bytes], bool] | None = None,
+    ) -> bytes:
+        """
+        Value dari cache, atau hasil `fill()` (satu pengisi per key). Kalau
+        `cacheable(value)` False, hasil fill diberikan ke caller (dan yang
+        sedang menunggu) tanpa disimpan.
+        """
+
+        value = await self.get(key)
+
+        if value is not None:
+            self.hits += 1
+            record_outcome(self.namespace, "h")
+            return value
+
+        self.misses += 1
+
+        # single-flight dalam proses
+        if key in self.inflight:
+            record_outcome(self.namespace, "w")
+            return await asyncio.shield(self.inflight[key])
+
+        record_outcome(self.namespace, "m")
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+
+        try:
+            value = await self._fill_shared(key, ttl, fill, cacheable)
+            future.set_result(value)
+            return value
+
+        except Exception as e:
+            future.set_exception(e)
+            # hindari warning "exception never retrieved" kalau tidak ada yang menunggu
+            future.exception()
+            raise
+
+        finally:
+            if not future.done():
+                future.cancel()
+
+            del self.inflight[key]
+
+    async def _acquire(self, lock: str) -> bool:
+        try:
+            return await self.backend.acquire(lock, self.lock_ttl)
+        except Exception:
+            return True
+
+    async def _fill_shared(self, key: str, ttl: float, fill, cacheable=None) -> bytes:
+        """Single-flight antar worker: hanya pemegang lock yang fetch upstream"""
+
+        lock = self.key(f"lock:{key}")
+
+        deadline = time.monotonic() + self.lock_ttl
+        delay = 0.01
+
+        # tunggu worker lain selesai mengisi; kalau lock dilepas tanpa value
+        # (misalnya upstream error), ambil alih dan fetch sendiri
+        while not (owner := await self._acquire(lock)) and time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+
+            value = await self.get(key)
+
+            if value is not None:
+                return value
+
+            delay = min(delay * 2, 0.2)
+
+        try:
+            value = await fill()
+
+            if cacheable is None or cacheable(value):
+                await self.set(key, value, ttl)
+
+            return value
+
+        finally:
+            if owner:
+                try:
+                    await self.backend.release(lock)
+                except Exception:
+                    pass
+
+
+# ====================================
+# NEGATIVE CACHE (404 & UPSTREAM ERROR)
+# ====================================
+
+class BloomFilter:
+    """Bloom filter ukuran tetap (double hashing dari satu digest blake2b)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class NegativeCache:
+    """
+    Ingat URL yang 404 dan URL yang error berulang, dengan TTL terpisah.
+
+    - LRU kecil menyimpan status + detail + expiry (sumber kebenaran).
+    - URL 404 juga masuk Bloom filter dua generasi (dirotasi tiap
+      `not_found_ttl / 2`, jadi entry bloom hidup paling lama `not_found_ttl`),
+      supaya banjir slug acak yang sudah terdorong keluar dari LRU tetap tidak
+      sampai ke upstream, dengan memori tetap. Bloom hanya dipakai untuk key
+      yang tidak ada di LRU.
+    - Error upstream (5xx / network) baru di-cache setelah `error_threshold`
+      kali berturut-turut, dengan TTL pendek.
+    """
+
+    def __init__(
+        self,
+        not_found_ttl: float = 300.0,
+        error_ttl: float = 5.0,
+        error_threshold: int = 2,
+        max_entries: int = 10000,
+        bloom_capacity: int = 100000,
+    ):
+        self.not_found_ttl = not_found_ttl
+        self.error_ttl = error_ttl
+        self.error_threshold = error_threshold
+        self.max_entries = max_entries
+        self.bloom_capacity = bloom_capacity
+        self.entries: OrderedDict[str, list] = OrderedDict()
+        self.current = BloomFilter(bloom_capacity)
+        self.previous = BloomFilter(bloom_capacity)
+        self.rotated = time.monotonic()
+
+    def check(self, key: str) -> tuple[int, str] | None:
+        """Return (status, detail) kalau `key` masih ter-cache negatif"""
+
+        now = time.monotonic()
+
+        entry = self.entries.get(key)
+
+        if entry is not None:
+            status, detail, expires, failures = entry
+
+            if expires > now:
+                self.entries.move_to_end(key)
+                return status, detail
+
+            # LRU masih tahu key ini dan sudah kadaluarsa: bloom tidak dipakai
+            return None
+
+        self._rotate(now)
+
+        if key in self.current or key in self.previous:
+            return 404, "Source error"
+
+        return None
+
+    def record(self, key: str, status: int, detail: str):
+        now = time.monotonic()
+
+        if status == 404:
+            self._store(key, [status, detail, now + self.not_found_ttl, 0])
+            self._rotate(now)
+            self.current.add(key)
+            return
+
+        if status < 500:
+            return
+
+        entry = self.entries.get(key)
+        failures = (entry[3] if entry else 0) + 1
+
+        # belum berulang: catat jumlah gagal saja, belum di-cache
+        expires = now + self.error_ttl if failures >= self.error_threshold else 0.0
+
+        self._store(key, [status, detail, expires, failures])
+
+    def forget(self, key: str):
+        """Dipanggil saat URL berhasil: reset hitungan error dan entry 404"""
+
+        if self.entries.pop(key, None) is None:
+            return
+
+        # bloom tidak bisa menghapus key: entry kadaluarsa menutupi bloom
+        # sampai generasinya dirotasi
+        if key in self.current or key in self.previous:
+            self._store(key, [200, "", 0.0, 0])
+
+    def _store(self, key: str, entry: list):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _rotate(self, now: float):
+        # generasi lama dibuang: entry bloom hidup antara 0.5x dan 1x TTL
+        if now - self.rotated >= self.not_found_ttl / 2 or self.current.count >= self.bloom_capacity:
+            self.previous = self.current
+            self.current = BloomFilter(self.bloom_capacity)
+            self.rotated = now
+
+
+def backend_from_env() -> CacheBackend:
+    kind = os.getenv("CACHE_BACKEND", "memory").lower()
+    url = os.getenv("CACHE_URL")
+    max_bytes = os.getenv("CACHE_MAX_BYTES")
+
+    if kind == "sqlite":
+        return SQLiteBackend(
+            url or "/tmp/komikcast-cache.sqlite3",
+            max_bytes=int(max_bytes) if max_bytes else 512 * 1024 * 1024,
+        )
+
+    if kind == "redis":
+        return RedisBackend(url) if url else RedisBackend()
+
+    return MemoryBackend(max_bytes=int(max_bytes)) if max_bytes else MemoryBackend()
@@ -0,0 +1,90 @@
+"""
+Negosiasi Accept-Encoding dan kompresi body JSON.
+
+gzip selalu tersedia. br dan zstd memakai package brotli dan zstandard
+(dependency di pyproject.toml; di Python 3.14+ zstd dari stdlib). Kalau
+package tidak terpasang, encoding itu dilewati dan negosiasi jatuh ke gzip.
+Codec di-import saat pertama dipakai supaya tidak menambah cold start.
+"""
+
+import gzip
+
+
+# Urutan preferensi server kalau client menerima beberapa encoding
+PREFERENCE = ("zstd", "br", "gzip")
+
+# Level untuk body yang dikompresi sekali lalu disimpan di cache,
+# dan untuk body yang dikompresi per request
+LEVELS = {
+    "cached": {"gzip": 9, "br": 9, "zstd": 12},
+    "fast": {"gzip": 5, "br": 4, "zstd": 3},
+}
+
+_codecs = {}
+
+
+def _codec(encoding: str):
+    """Return fungsi compress(body, level) atau None kalau codec tidak tersedia"""
+
+    if encoding in _codecs:
+        return _codecs[encoding]
+
+    codec = None
+
+    if encoding == "gzip":
+        codec = lambda body, level: gzip.compress(body, compresslevel=level, mtime=0)
+
+    elif encoding == "br":
+        try:
+            import brotli
+            codec = lambda body, level: brotli.compress(body, quality=level, mode=brotli.MODE_TEXT)
+        except ImportError:
+            pass
+
+    elif encoding == "zstd":
+        try:
+            from compression import zstd
+            codec = lambda body, level: zstd.compress(body, level=level)
+        except ImportError:
+            try:
+                import zstandard
+                codec = lambda body, level: zstandard.ZstdCompressor(level=level).compress(body)
+            except ImportError:
+                pass
+
+    _codecs[encoding] = codec
+
+    return codec
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Pilih encoding terbaik yang diterima client dan tersedia di server"""
+
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+
+        accepted[name.strip()] = q
+
+    wildcard = accepted.get("*", 0.0)
+
+    for encoding in PREFERENCE:
+        if accepted.get(encoding, wildcard) > 0 and _codec(encoding) is not None:
+            return encoding
+
+    return None
+
+
+def compress(body: bytes, encoding: str, profile: str = "fast") -> bytes:
+    return _codec(encoding)(body, LEVELS[profile][encoding])
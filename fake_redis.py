@@ -0,0 +1,262 @@
+"""
+Stand-in server protokol Redis (RESP2) untuk menjalankan CACHE_BACKEND=redis
+secara lokal tanpa Redis sungguhan. Hanya command yang dipakai cache.py:
+PING, AUTH, SELECT, GET, SET (NX / PX / EX), DEL.
+
+    python fake_redis.py --port 6390            # jalankan server
+    CACHE_BACKEND=redis CACHE_URL=redis://127.0.0.1:6390/0 uvicorn main:app
+
+    python fake_redis.py --check                # cek RedisBackend + Cache terhadap stand-in
+"""
+
+import argparse
+import asyncio
+import time
+
+from cache import Cache, RedisBackend, RedisError
+
+
+class FakeRedis:
+    """Satu keyspace per db, expiry dicek saat key dibaca"""
+
+    def __init__(self, password: str | None = None, delay: float = 0.0):
+        self.password = password
+        self.delay = delay
+        self.dbs: dict[int, dict[bytes, tuple[bytes, float | None]]] = {}
+
+    def lookup(self, db: int, key: bytes) -> bytes | None:
+        entry = self.dbs.get(db, {}).get(key)
+
+        if entry is None:
+            return None
+
+        value, expires = entry
+
+        if expires is not None and expires <= time.monotonic():
+            del self.dbs[db][key]
+            return None
+
+        return value
+
+    def execute(self, session: dict, args: list[bytes]):
+        name = args[0].upper()
+
+        if name == b"AUTH":
+            if self.password is not None and args[-1].decode() != self.password:
+                return RedisError("WRONGPASS invalid password")
+
+            session["auth"] = True
+            return b"OK"
+
+        if self.password is not None and not session.get("auth"):
+            return RedisError("NOAUTH Authentication required")
+
+        if name == b"PING":
+            return b"PONG"
+
+        if name == b"SELECT":
+            session["db"] = int(args[1])
+            return b"OK"
+
+        db = session.get("db", 0)
+        keys = self.dbs.setdefault(db, {})
+
+        if name == b"GET":
+            return self.lookup(db, args[1])
+
+        if name == b"DEL":
+            removed = 0
+
+            for key in args[1:]:
+                if self.lookup(db, key) is not None:
+                    del keys[key]
+                    removed += 1
+
+            return removed
+
+        if name == b"SET":
+            key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+
+            expires = None
+
+            for i, option in enumerate(options):
+                if option == b"PX":
+                    expires = time.monotonic() + int(options[i + 1]) / 1000
+                elif option == b"EX":
+                    expires = time.monotonic() + int(options[i + 1])
+
+            if b"NX" in options and self.lookup(db, key) is not None:
+                return None
+
+            keys[key] = (value, expires)
+            return b"OK"
+
+        return RedisError(f"ERR unknown command '{name.decode(errors='replace')}'")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = {}
+
+        try:
+            while True:
+                args = await read_command(reader)
+
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+
+                writer.write(encode_reply(self.execute(session, args)))
+                await writer.drain()
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 6379) -> asyncio.Server:
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def read_command(reader: asyncio.StreamReader) -> list[bytes]:
+    line = await reader.readuntil(b"\r\n")
+
+    if line[:1] != b"*":
+        # inline command (mis. dari telnet / redis-cli lama)
+        return line.split()
+
+    args = []
+
+    for _ in range(int(line[1:-2])):
+        size = int((await reader.readuntil(b"\r\n"))[1:-2])
+        args.append((await reader.readexactly(size + 2))[:-2])
+
+    return args
+
+
+def encode_reply(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+
+    if isinstance(value, RedisError):
+        return b"-%s\r\n" % str(value).encode()
+
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+
+    if value in (b"OK", b"PONG"):
+        return b"+%s\r\n" % value
+
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+# ====================================
+# SELF CHECK
+# ====================================
+
+async def check():
+    """Round trip RedisBackend + single-flight Cache terhadap stand-in"""
+
+    server = await FakeRedis(password="secret").serve(port=0)
+    port = server.sockets[0].getsockname()[1]
+
+    backend = RedisBackend(f"redis://:secret@127.0.0.1:{port}/2")
+
+    try:
+        await backend.set("a", b"\x00binary\r\nvalue", 60)
+        assert await backend.get("a") == b"\x00binary\r\nvalue"
+
+        await backend.set("short", b"1", 0.05)
+        await asyncio.sleep(0.1)
+        assert await backend.get("short") is None
+
+        assert await backend.acquire("lock", 60)
+        assert not await backend.acquire("lock", 60)
+        await backend.release("lock")
+        assert await backend.acquire("lock", 60)
+
+        await backend.delete("a")
+        assert await backend.get("a") is None
+
+        # dua "worker" (koneksi terpisah), satu fill upstream
+        other = RedisBackend(f"redis://:secret@127.0.0.1:{port}/2")
+        calls = 0
+
+        async def fill():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.1)
+            return b"body"
+
+        results = await asyncio.gather(
+            Cache(backend, "resp").get_or_fill("url", 60, fill),
+            Cache(other, "resp").get_or_fill("url", 60, fill),
+        )
+
+        assert results == [b"body", b"body"] and calls == 1, (results, calls)
+
+        await other.close()
+
+        # koneksi putus: request berikutnya connect ulang
+        await backend.close()
+        assert await backend.get("resp:url") == b"body"
+
+        # task dibatalkan di tengah round trip: reply "a" tidak boleh
+        # terbaca sebagai reply command berikutnya
+        lagging = FakeRedis(delay=0.05)
+        lagging.dbs[0] = {b"a": (b"AAA", None), b"b": (b"BBB", None)}
+        slow = await lagging.serve(port=0)
+        shared = RedisBackend(f"redis://127.0.0.1:{slow.sockets[0].getsockname()[1]}/0")
+
+        pending = asyncio.create_task(shared.get("a"))
+        await asyncio.sleep(0.02)
+        pending.cancel()
+
+        try:
+            await pending
+        except asyncio.CancelledError:
+            pass
+
+        assert await shared.get("b") == b"BBB"
+
+        await shared.close()
+        slow.close()
+        await slow.wait_closed()
+
+        try:
+            await RedisBackend(f"redis://:wrong@127.0.0.1:{port}/0").get("a")
+            raise AssertionError("expected auth error")
+        except RedisError:
+            pass
+
+    finally:
+        await backend.close()
+        server.close()
+        await server.wait_closed()
+
+    print("ok")
+
+
+async def run(host: str, port: int, password: str | None):
+    server = await FakeRedis(password).serve(host, port)
+
+    print(f"fake redis listening on {host}:{port}")
+
+    async with server:
+        await server.serve_forever()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Local Redis-protocol stand-in for the cache backend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--check", action="store_true", help="jalankan self check lalu keluar")
+    args = parser.parse_args()
+
+    if args.check:
+        asyncio.run(check())
+    else:
+        asyncio.run(run(args.host, args.port, args.password))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,183 @@
+"""
+Fake upstream komikcast (be.komikcast.cc + CDN gambar) untuk benchmark,
+replay dan testing lokal tanpa network.
+
+Pakai:
+
+    import main, fake_upstream
+    app = main.create_app(transport=fake_upstream.transport())
+"""
+
+import asyncio
+import random
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+
+SERIES_COUNT = 500
+CHAPTERS_PER_SERIES = 120
+IMAGES_PER_CHAPTER = 12
+
+IMAGE_HOST = "https://imgkc1.komikcast.cc"
+
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+# ====================================
+# DATA GENERATOR
+# ====================================
+
+def series_slug(i: int) -> str:
+    return f"series-{i}"
+
+
+def image_url(slug: str, chapter: int, page: int) -> str:
+    return f"{IMAGE_HOST}/wp-content/img/{slug}/{chapter}/{page:03d}.jpg"
+
+
+def created_at(i: int, n: int) -> str:
+    # chapter lebih tinggi selalu lebih baru, jadi chapter hasil release() jadi yang terbaru
+    when = EPOCH + timedelta(hours=n, seconds=i)
+    return when.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def chapter_ref(i: int, n: int) -> dict:
+    return {
+        "id": i * 100000 + n,
+        "data": {
+            "index": n,
+            "title": f"Chapter {n}",
+        },
+        "createdAt": created_at(i, n),
+    }
+
+
+def series_item(i: int, latest: int = CHAPTERS_PER_SERIES) -> dict:
+    slug = series_slug(i)
+
+    return {
+        "id": i,
+        "data": {
+            "title": f"Series {i}",
+            "slug": slug,
+            "coverImage": f"{IMAGE_HOST}/wp-content/img/{slug}/cover.jpg",
+            "backgroundImage": f"{IMAGE_HOST}/wp-content/img/{slug}/bg.jpg",
+            "status": "ongoing",
+            "type": "manhwa",
+            "rating": round(5 + (i % 50) / 10, 1),
+            "synopsis": f"Synopsis for series {i}. " * 8,
+            "genres": [{"id": g, "data": {"name": f"Genre {g}"}} for g in range(i % 5 + 1)],
+            "author": "",
+            "alternativeTitle": None,
+        },
+        "chapters": [chapter_ref(i, n) for n in range(latest, max(latest - 3, 0), -1)],
+        "updatedAt": created_at(i, latest),
+    }
+
+
+def png_bytes(width: int, height: int) -> bytes:
+    """PNG valid kecil (grayscale) dengan ukuran tertentu"""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    row = b"\x00" + bytes(i % 256 for i in range(width))
+    raw = zlib.compress(row * height)
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", raw)
+        + chunk(b"IEND", b"")
+    )
+
+
+# ====================================
+# HANDLER
+# ====================================
+
+class FakeUpstream:
+    """
+    Handler httpx.MockTransport. `latency` dalam detik (mean), `tail` adalah
+    peluang request lambat (10x latency) untuk mensimulasikan tail upstream.
+    `any_slug` memetakan slug apa pun (mis. dari access log produksi) ke
+    salah satu series palsu, bukan 404.
+    """
+
+    def __init__(self, latency: float = 0.0, tail: float = 0.0, seed: int = 1, any_slug: bool = False):
+        self.latency = latency
+        self.tail = tail
+        self.any_slug = any_slug
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.latest = {i: CHAPTERS_PER_SERIES for i in range(SERIES_COUNT)}
+        self._png = png_bytes(64, 96)
+
+    def release(self, i: int):
+        """Simulasikan chapter baru untuk series i (naik ke urutan teratas)"""
+        self.latest[i] += 1
+
+    def ordered(self) -> list:
+        # rilisan terbaru: chapter terbanyak duluan, lalu id
+        return sorted(self.latest, key=lambda i: (-self.latest[i], i))
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+
+        if self.latency or self.tail:
+            delay = self.latency * (10 if self.random.random() < self.tail else 1)
+            await asyncio.sleep(delay)
+
+        if request.url.host != "be.komikcast.cc":
+            return httpx.Response(200, content=self._png, headers={"content-type": "image/png"})
+
+        parts = [p for p in request.url.path.split("/") if p]
+
+        if parts == ["series"]:
+            take = int(request.url.params.get("take", 20))
+            page = int(request.url.params.get("page", 1))
+            ids = self.ordered()[(page - 1) * take: page * take]
+            return httpx.Response(200, json={"data": [series_item(i, self.latest[i]) for i in ids]})
+
+        suffix = parts[1].removeprefix("series-") if len(parts) >= 2 else ""
+
+        i = int(suffix) if suffix.isdigit() else -1
+
+        if i not in self.latest and self.any_slug and len(parts) >= 2:
+            i = zlib.crc32(parts[1].encode()) % SERIES_COUNT
+
+        if i not in self.latest:
+            return httpx.Response(404, json={"message": "Not found"})
+
+        if len(parts) == 2:
+            return httpx.Response(200, json={"data": series_item(i, self.latest[i])})
+
+        if len(parts) == 3 and parts[2] == "chapters":
+            refs = [chapter_ref(i, n) for n in range(self.latest[i], 0, -1)]
+            return httpx.Response(200, json={"data": refs})
+
+        if len(parts) == 4 and parts[2] == "chapters":
+            digits = "".join(c for c in parts[3] if c.isdigit() or c == ".")
+
+            try:
+                n = int(float(digits))
+            except ValueError:
+                n = 0
+
+            if not 1 <= n <= self.latest[i]:
+                return httpx.Response(404, json={"message": "Not found"})
+
+            slug = series_slug(i)
+            detail = chapter_ref(i, n)
+            detail["data"]["dataImages"] = [image_url(slug, n, p) for p in range(1, IMAGES_PER_CHAPTER + 1)]
+            return httpx.Response(200, json={"data": detail})
+
+        return httpx.Response(404, json={"message": "Not found"})
+
+
+def transport(upstream: FakeUpstream | None = None) -> httpx.MockTransport:
+    return httpx.MockTransport(upstream or FakeUpstream())
@@ -0,0 +1,291 @@
+"""
+Delta feed untuk /series/updates.
+
+Poller mengambil head `rilisan_terbaru` dan menyimpannya sebagai snapshot.
+Setiap item diberi watermark dari data upstream (waktu chapter terbaru,
+dalam milidetik). Token yang diterima client adalah watermark terbesar
+di snapshot, dan `since` mengembalikan item yang watermark-nya lebih baru.
+
+Karena token berasal dari upstream, bukan dari proses, token dari satu
+worker / instance berlaku di worker / instance lain, juga dengan backend
+memory (mis. di serverless). Dengan backend sqlite/redis semua worker
+berbagi satu snapshot; hanya satu worker yang polling per interval
+(lock SET NX). Kalau backend tidak bisa dihubungi, feed jalan dengan
+snapshot di proses sendiri sampai backend kembali.
+"""
+
+import asyncio
+import json
+import math
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from cache import CacheBackend
+
+
+STATE_KEY = "feed:snapshot"
+HEAD_KEY = "feed:snapshot:head"
+LOCK_KEY = "feed:lock"
+
+
+def chapter_number(ref):
+    """Nomor chapter dari chapter ref upstream (None kalau tidak ada)"""
+
+    if not isinstance(ref, dict):
+        return None
+
+    data = ref.get("data") if isinstance(ref.get("data"), dict) else ref
+
+    for key in ("index", "chapterIndex", "number"):
+
+        value = data.get(key)
+
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if math.isfinite(value):
+                return value
+            continue
+
+        if isinstance(value, str):
+            try:
+                number = float(value)
+            except ValueError:
+                continue
+
+            # "nan" / "inf" lolos float() tapi merusak sort + bisect ChapterIndex
+            if math.isfinite(number):
+                return number
+
+    return None
+
+
+def timestamp_ms(value) -> int | None:
+    """Timestamp ISO upstream (mis. 2026-01-01T00:00:00.000Z) -> unix milidetik"""
+
+    if not isinstance(value, str):
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+
+    return int(parsed.timestamp() * 1000)
+
+
+def item_mark(item: dict) -> int | None:
+    """
+    Watermark item: createdAt chapter terbaru, atau updatedAt series kalau
+    chapter tidak punya timestamp. None kalau keduanya tidak ada.
+    """
+
+    marks = [
+        timestamp_ms(ref.get("createdAt"))
+        for ref in item.get("chapters") or []
+        if isinstance(ref, dict)
+    ]
+
+    marks = [m for m in marks if m is not None]
+
+    if marks:
+        return max(marks)
+
+    return timestamp_ms(item.get("updatedAt"))
+
+
+def new_state() -> dict:
+    return {
+        "polledAt": 0.0,
+        "order": [],
+        "items": {},
+        "marks": {},
+    }
+
+
+class SeriesFeed:
+    """
+    `fetch_head(fresh)` mengembalikan list item upstream (urutan rilisan
+    terbaru); `fresh=False` boleh dilayani dari cache. Item disimpan mentah,
+    jadi projection/clean/proxify tetap dilakukan route.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        fetch_head: Callable[[bool], Awaitable[list]],
+        interval: float = 60.0,
+        ttl: float = 86400.0,
+    ):
+        self.backend = backend
+        self.fetch_head = fetch_head
+        self.interval = interval
+        self.ttl = ttl
+        self.head = None
+        self.state = None
+
+    # ====================================
+    # STATE
+    # ====================================
+
+    async def load(self) -> dict | None:
+        """
+        State terbaru dari backend; blob hanya dibaca ulang kalau head berubah.
+        Backend error: pakai snapshot terakhir di proses ini (None kalau belum ada).
+        """
+
+        try:
+            head = await self.backend.get(HEAD_KEY)
+
+            if head is None:
+                return None
+
+            if head != self.head:
+                blob = await self.backend.get(STATE_KEY)
+
+                if blob is None:
+                    return None
+
+                self.state = json.loads(blob)
+                self.head = head
+
+        except Exception:
+            return self.state
+
+        return self.state
+
+    async def save(self, state: dict):
+        head = f"{self.token(state)}-{state['polledAt']}".encode()
+
+        self.state = state
+        self.head = head
+
+        try:
+            await self.backend.set(STATE_KEY, json.dumps(state, separators=(",", ":")).encode(), self.ttl)
+            await self.backend.set(HEAD_KEY, head, self.ttl)
+        except Exception:
+            # backend down: snapshot tetap dipakai di proses ini
+            pass
+
+    # ====================================
+    # POLL & DIFF
+    # ====================================
+
+    async def poll(self, fresh: bool = True) -> list:
+        """Poll upstream sekali (kalau lock didapat). Return item yang berubah."""
+
+        try:
+            owner = await self.backend.acquire(LOCK_KEY, self.interval)
+        except Exception:
+            # backend down: tidak ada koordinasi antar worker, poll sendiri
+            owner = True
+
+        if not owner:
+            return []
+
+        try:
+            state = await self.load() or new_state()
+            items = await self.fetch_head(fresh)
+            changed = self.apply(state, items)
+            await self.save(state)
+
+        except Exception:
+            # poll gagal: lepas lock supaya worker lain / request berikutnya bisa coba
+            try:
+                await self.backend.release(LOCK_KEY)
+            except Exception:
+                pass
+
+            raise
+
+        return changed
+
+    def apply(self, state: dict, items: list) -> list:
+        """Ganti snapshot di `state` (in-place) dengan `items`. Return item yang berubah."""
+
+        changed = []
+
+        order = []
+        snapshot = {}
+        marks = {}
+
+        for item in items:
+
+            if not isinstance(item, dict) or item.get("id") is None:
+                continue
+
+            key = str(item["id"])
+            mark = item_mark(item)
+
+            order.append(key)
+            snapshot[key] = item
+            marks[key] = mark
+
+            if state["marks"].get(key) != mark:
+                changed.append(item)
+
+        state["order"] = order
+        state["items"] = snapshot
+        state["marks"] = marks
+        state["polledAt"] = time.time()
+
+        return changed
+
+    async def ensure_fresh(self) -> dict:
+        """Dipakai request: poll inline kalau snapshot sudah basi (mis. tanpa background task)"""
+
+        state = await self.load()
+
+        if state is None or time.time() - state["polledAt"] > self.interval * 2:
+            await self.poll(fresh=False)
+            state = await self.load()
+
+        return state or new_state()
+
+    async def run(self):
+        """Loop background: poll tiap `interval` detik"""
+
+        while True:
+
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+
+            await asyncio.sleep(self.interval)
+
+    # ====================================
+    # QUERY
+    # ====================================
+
+    def token(self, state: dict) -> str:
+        marks = [m for m in state["marks"].values() if m is not None]
+
+        return str(max(marks, default=0))
+
+    def changes_since(self, state: dict, since: str | None):
+        """
+        Return (items, token, reset). Item yang watermark-nya lebih baru dari
+        `since`, terbaru duluan. Token tidak valid, atau lebih lama dari item
+        tertua di head (perubahan mungkin sudah keluar dari head), menghasilkan
+        reset: seluruh snapshot dikirim ulang.
+        """
+
+        token = self.token(state)
+
+        marks = [(state["marks"][key], key) for key in state["order"] if state["marks"].get(key) is not None]
+
+        # isascii: isdigit() juga menerima digit Unicode (mis. "²") yang ditolak int()
+        if not since or not (since.isascii() and since.isdigit()) or (marks and int(since) < min(marks)[0]):
+            return [state["items"][key] for key in state["order"]], token, True
+
+        since = int(since)
+
+        items = [state["items"][key] for mark, key in sorted(marks, reverse=True) if mark > since]
+
+        # snapshot instance ini bisa lebih lama dari token client: token tidak mundur
+        return items, str(max(int(token), since)), False
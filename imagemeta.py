@@ -0,0 +1,121 @@
+"""
+Metadata gambar chapter: ukuran (width/height), jumlah byte, dan
+placeholder LQIP kecil (data URI) supaya reader bisa layout halaman
+sebelum gambar selesai dimuat.
+
+Ukuran dibaca langsung dari header PNG/JPEG/GIF/WebP tanpa decode.
+Placeholder dibuat dengan Pillow (dependency di pyproject.toml); kalau
+Pillow tidak terpasang field `placeholder` tidak diisi. `image_meta()` murni CPU dan dijalankan di
+worker pool oleh main.py.
+"""
+
+import base64
+import io
+import struct
+
+
+PLACEHOLDER_SIZE = 16
+
+
+def image_size(data: bytes) -> tuple[int, int] | None:
+    """(width, height) dari header gambar, None kalau format tidak dikenal"""
+
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        return struct.unpack("<HH", data[6:10])
+
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP" and len(data) >= 30:
+        return webp_size(data)
+
+    if data[:2] == b"\xff\xd8":
+        return jpeg_size(data)
+
+    return None
+
+
+def webp_size(data: bytes) -> tuple[int, int] | None:
+    chunk = data[12:16]
+
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+
+    if chunk == b"VP8L":
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+
+    if chunk == b"VP8X":
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+
+    return None
+
+
+def jpeg_size(data: bytes) -> tuple[int, int] | None:
+    pos = 2
+
+    while pos + 9 < len(data):
+
+        if data[pos] != 0xFF:
+            return None
+
+        marker = data[pos + 1]
+
+        # padding 0xFF
+        if marker == 0xFF:
+            pos += 1
+            continue
+
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+
+        # SOF0..SOF15 kecuali DHT (C4), JPG (C8), DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+            return width, height
+
+        pos += 2 + length
+
+    return None
+
+
+def placeholder(data: bytes) -> str | None:
+    """LQIP: thumbnail kecil JPEG sebagai data URI (butuh Pillow)"""
+
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            # JPEG: decode langsung di resolusi kecil (jauh lebih cepat)
+            img.draft("RGB", (PLACEHOLDER_SIZE * 2, PLACEHOLDER_SIZE * 2))
+            img = img.convert("RGB")
+            img.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE * 4))
+
+            out = io.BytesIO()
+            img.save(out, "JPEG", quality=40, optimize=True)
+
+    except Exception:
+        return None
+
+    return "data:image/jpeg;base64," + base64.b64encode(out.getvalue()).decode()
+
+
+def image_meta(data: bytes) -> dict:
+    size = image_size(data)
+
+    meta = {"bytes": len(data)}
+
+    if size is not None:
+        meta["width"], meta["height"] = size
+
+    lqip = placeholder(data)
+
+    if lqip is not None:
+        meta["placeholder"] = lqip
+
+    return meta
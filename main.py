@@ -1,25 +1,33 @@
-from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi import APIRouter, FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 import httpx
 from typing import Any
 from urllib.parse import urlparse, quote
-
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, deque
+
+from accesslog import AccessLog, AccessLogMiddleware
+from cache import Cache, CacheBackend, NegativeCache, backend_from_env
+from compress import compress, negotiate
+from feed import SeriesFeed, chapter_number
+from resolver import BlockedHostError, CachingResolver, PinnedTransport
+from imagemeta import image_meta
+from records import decode_series_page, encode_series_list, series_items
+from ratelimit import RateLimitMiddleware, SharedTokenBucket, TokenBucket
+from stream import Broadcaster, Event, sse_stream
+
+import asyncio
+import functools
+import json
 import os
+import random
+import time
+import zlib
 
-app = FastAPI()
-
-# ====================================
-# ENABLE PUBLIC CORS
-# ====================================
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+router = APIRouter()
 
 # ====================================
 # CONFIG
@@ -32,13 +40,623 @@ HEADERS = {
     "Referer": "https://v1.komikcast.fit/"
 }
 
-client = httpx.AsyncClient(
-    headers=HEADERS,
-    timeout=30.0
+IMAGE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Connection": "keep-alive",
+    "Sec-Fetch-Dest": "image",
+    "Sec-Fetch-Mode": "no-cors",
+    "Sec-Fetch-Site": "cross-site",
+}
+
+# Domain gambar komikcast yang sudah dikenal: lolos validasi tanpa DNS lookup.
+# Tambahan dipisah koma lewat IMAGE_HOST_ALLOWLIST (domain atau hostname lengkap).
+IMAGE_HOST_ALLOWLIST = frozenset(
+    h.strip().lower()
+    for h in ("komikcast.cc,komikcast.fit," + os.getenv("IMAGE_HOST_ALLOWLIST", "")).split(",")
+    if h.strip()
 )
 
+# Cache DNS untuk host gambar lain (detik)
+DNS_CACHE_TTL = float(os.getenv("DNS_CACHE_TTL", "300"))
+
+# Jaga koneksi ke host gambar paling sering dipakai tetap hangat
+IMAGE_PREWARM_HOSTS = int(os.getenv("IMAGE_PREWARM_HOSTS", "3"))
+IMAGE_PREWARM_INTERVAL = float(os.getenv("IMAGE_PREWARM_INTERVAL", "30"))
+
+# Metadata gambar chapter (ukuran, bytes, placeholder) dihitung di worker pool
+# saat gambar pertama kali masuk image cache; N halaman pertama diberi Link preload
+IMAGE_META_WORKERS = int(os.getenv("IMAGE_META_WORKERS", "2"))
+# Batas job metadata yang antri; lebih dari ini, gambar baru dilewati (dihitung
+# lagi saat gambar itu berikutnya masuk image cache)
+IMAGE_META_QUEUE = int(os.getenv("IMAGE_META_QUEUE", "64"))
+IMAGE_PRELOAD_COUNT = int(os.getenv("IMAGE_PRELOAD_COUNT", "3"))
+
+# Buka koneksi ke upstream saat startup (berguna kalau cold start jarang)
+PREWARM = os.getenv("PREWARM", "false").lower() == "true"
+
 SOURCE_PAGE_SIZE = 20
 
+# TTL cache (detik). Backend dipilih lewat CACHE_BACKEND / CACHE_URL, lihat cache.py
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+IMAGE_CACHE_TTL = float(os.getenv("IMAGE_CACHE_TTL", "86400"))
+
+# Negative cache per proses: URL 404 dan URL yang error berulang
+NEGATIVE_404_TTL = float(os.getenv("NEGATIVE_404_TTL", "120"))
+NEGATIVE_ERROR_TTL = float(os.getenv("NEGATIVE_ERROR_TTL", "5"))
+
+# Delta feed /series/updates: berapa item head rilisan_terbaru yang di-snapshot,
+# seberapa sering dipoll, dan apakah poller jalan di background (lifespan)
+FEED_HEAD_SIZE = int(os.getenv("FEED_HEAD_SIZE", "100"))
+FEED_POLL_INTERVAL = float(os.getenv("FEED_POLL_INTERVAL", "60"))
+FEED_BACKGROUND = os.getenv("FEED_BACKGROUND", "true").lower() == "true"
+
+# Push rilisan baru (/series/stream SSE, /series/ws WebSocket)
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "16"))
+STREAM_MAX_SUBSCRIBERS = int(os.getenv("STREAM_MAX_SUBSCRIBERS", "50000"))
+# Batas koneksi stream bersamaan per client (API key / IP, lihat client_key)
+STREAM_MAX_PER_CLIENT = int(os.getenv("STREAM_MAX_PER_CLIENT", "8"))
+STREAM_WATCH_INTERVAL = float(os.getenv("STREAM_WATCH_INTERVAL", "2"))
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+
+# Halaman upstream /series yang disimpan sebagai JSON per item per proses:
+# maksimal jumlah halaman dan total bytes JSON yang disimpan
+SERIES_PAGE_CACHE_SIZE = int(os.getenv("SERIES_PAGE_CACHE_SIZE", "256"))
+SERIES_PAGE_CACHE_MAX_BYTES = int(os.getenv("SERIES_PAGE_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Index chapter per proses: maksimal jumlah series dan total ukuran body
+# upstream yang di-index (memori index kira-kira beberapa kali ukuran body)
+CHAPTER_INDEX_SIZE = int(os.getenv("CHAPTER_INDEX_SIZE", "256"))
+CHAPTER_INDEX_MAX_BYTES = int(os.getenv("CHAPTER_INDEX_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Rate limit per client: token per detik + burst, bucket terpisah untuk
+# route JSON dan /proxy. RATE_LIMIT_SHARED=true menyimpan bucket di cache
+# backend supaya berlaku lintas worker.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_SHARED = os.getenv("RATE_LIMIT_SHARED", "false").lower() == "true"
+RATE_LIMIT_JSON = (float(os.getenv("RATE_LIMIT_JSON_RATE", "5")), float(os.getenv("RATE_LIMIT_JSON_BURST", "30")))
+RATE_LIMIT_PROXY = (float(os.getenv("RATE_LIMIT_PROXY_RATE", "30")), float(os.getenv("RATE_LIMIT_PROXY_BURST", "200")))
+
+# Client diidentifikasi lewat X-API-Key hanya kalau key-nya terdaftar di
+# API_KEYS (dipisah koma); key lain / tanpa key memakai IP
+API_KEYS = frozenset(k.strip() for k in os.getenv("API_KEYS", "").split(",") if k.strip())
+
+# Pakai X-Forwarded-For / X-Real-IP untuk IP client. Hanya aman di belakang
+# proxy yang menulis header itu sendiri; default aktif di Vercel saja.
+# TRUSTED_PROXY_HOPS = jumlah proxy terpercaya di depan app: IP client diambil
+# dari hop ke-N dari kanan (hop kiri bisa dipalsukan client).
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "true" if os.getenv("VERCEL") else "false").lower() == "true"
+TRUSTED_PROXY_HOPS = max(int(os.getenv("TRUSTED_PROXY_HOPS", "1")), 1)
+
+# Path access log ringkas (route, params, status, latency, cache) untuk
+# replay.py; kosong = tidak mencatat
+ACCESS_LOG = os.getenv("ACCESS_LOG", "")
+
+# Body JSON lebih kecil dari ini tidak dikompresi
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+
+# Body sebesar ini ke atas dikompresi di thread pool, bukan di event loop
+COMPRESS_OFFLOAD_SIZE = int(os.getenv("COMPRESS_OFFLOAD_SIZE", "65536"))
+COMPRESS_WORKERS = int(os.getenv("COMPRESS_WORKERS", "2"))
+
+
+# ====================================
+# HTTP CLIENTS
+# ====================================
+
+# Client dibuat di lifespan, bukan saat import, supaya cold start cepat.
+# Kalau runtime tidak menjalankan lifespan, client dibuat saat pertama dipakai.
+client: httpx.AsyncClient | None = None
+
+image_client: httpx.AsyncClient | None = None
+
+upstream_transport: httpx.AsyncBaseTransport | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Client untuk JSON API upstream"""
+    global client
+
+    if client is None:
+        client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=30.0,
+            transport=upstream_transport
+        )
+
+    return client
+
+
+def get_image_client() -> httpx.AsyncClient:
+    """Client untuk fetch gambar (dipakai bersama, bukan per request)"""
+    global image_client
+
+    if image_client is None:
+
+        transport = upstream_transport
+
+        # connect hanya ke IP yang sudah divalidasi resolver (redirect / DNS rebinding ikut dicek)
+        if transport is None:
+            transport = PinnedTransport(
+                get_resolver(),
+                limits=httpx.Limits(keepalive_expiry=IMAGE_PREWARM_INTERVAL * 2)
+            )
+
+        image_client = httpx.AsyncClient(
+            headers=IMAGE_HEADERS,
+            timeout=30.0,
+            follow_redirects=True,
+            transport=transport
+        )
+
+    return image_client
+
+
+# ====================================
+# IMAGE HOSTS: DNS CACHE, ALLOWLIST, PREWARM
+# ====================================
+
+resolver: CachingResolver | None = None
+
+# jumlah request per host gambar, diluruhkan tiap putaran prewarm dan saat
+# jumlah host melewati batas (tanpa prewarm loop, mis. di serverless)
+image_host_hits: Counter = Counter()
+
+IMAGE_HOST_HITS_MAX = 1024
+
+
+def get_resolver() -> CachingResolver:
+    global resolver
+
+    if resolver is None:
+        resolver = CachingResolver(DNS_CACHE_TTL)
+
+    return resolver
+
+
+def is_allowed_image_host(hostname: str) -> bool:
+    """Fast path O(1): hostname atau domain-nya ada di allowlist"""
+
+    if hostname in IMAGE_HOST_ALLOWLIST:
+        return True
+
+    return ".".join(hostname.rsplit(".", 2)[-2:]) in IMAGE_HOST_ALLOWLIST
+
+
+def count_image_host(hostname: str):
+    image_host_hits[hostname] += 1
+
+    if len(image_host_hits) > IMAGE_HOST_HITS_MAX:
+        decay_image_host_hits()
+
+        # semua host sama-sama jarang dipakai: buang yang paling sedikit
+        for host, _ in image_host_hits.most_common()[IMAGE_HOST_HITS_MAX // 2:]:
+            del image_host_hits[host]
+
+
+def decay_image_host_hits():
+    """Peluruhan supaya host yang sudah tidak dipakai turun peringkat"""
+
+    for host in list(image_host_hits):
+        image_host_hits[host] //= 2
+
+        if not image_host_hits[host]:
+            del image_host_hits[host]
+
+
+async def prewarm_image_hosts():
+    """Loop background: buka / jaga koneksi keep-alive ke host gambar terpanas"""
+
+    while True:
+
+        await asyncio.sleep(IMAGE_PREWARM_INTERVAL)
+
+        hosts = [host for host, _ in image_host_hits.most_common(IMAGE_PREWARM_HOSTS)]
+
+        decay_image_host_hits()
+
+        async def warm(host: str):
+            try:
+                await get_image_client().head(f"https://{host}/", timeout=5.0)
+            except Exception:
+                pass
+
+        await asyncio.gather(*[warm(host) for host in hosts])
+
+
+# ====================================
+# IMAGE METADATA
+# ====================================
+
+meta_executor: ThreadPoolExecutor | None = None
+
+meta_cache: Cache | None = None
+
+# task background yang sedang jalan (referensi supaya tidak di-GC)
+background_tasks: set = set()
+
+# Disimpan di meta cache untuk gambar yang gagal di-fetch lewat /proxy,
+# supaya response chapter tetap bisa di-cache (metadata-nya null)
+IMAGE_META_FAILED = b"null"
+
+
+def get_meta_cache() -> Cache:
+    """Metadata gambar per URL upstream (JSON)"""
+    global meta_cache
+
+    if meta_cache is None:
+        meta_cache = Cache(get_cache_backend(), "meta")
+
+    return meta_cache
+
+
+def spawn(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+async def store_image_meta(url: str, content: bytes):
+    """Decode/resize di thread pool (Pillow melepas GIL), lalu simpan ke meta cache"""
+    global meta_executor
+
+    if meta_executor is None:
+        meta_executor = ThreadPoolExecutor(IMAGE_META_WORKERS, thread_name_prefix="image-meta")
+
+    loop = asyncio.get_running_loop()
+
+    meta = await loop.run_in_executor(meta_executor, image_meta, content)
+
+    await get_meta_cache().set(url, render_json(meta), IMAGE_CACHE_TTL)
+
+
+def queue_image_meta(url: str, content: bytes):
+    """Jadwalkan store_image_meta; dilewati kalau antrian sudah penuh"""
+
+    if len(background_tasks) >= IMAGE_META_QUEUE:
+        return
+
+    spawn(store_image_meta(url, content))
+
+
+async def chapter_images_meta(urls: list) -> tuple[list, bool]:
+    """
+    Metadata per gambar dari meta cache, plus apakah semuanya sudah diketahui.
+    Metadata hanya dihitung saat gambar lewat /proxy; gambar yang belum pernah
+    diminta bernilai None (dan response-nya belum boleh di-cache).
+    """
+
+    cache = get_meta_cache()
+
+    raws = await asyncio.gather(*[cache.get(url) for url in urls])
+
+    result = [json.loads(raw) if raw is not None else None for raw in raws]
+
+    return result, None not in raws
+
+
+def find_images(obj: Any):
+    """Dict yang berisi key dataImages (dicari rekursif), None kalau tidak ada"""
+
+    if isinstance(obj, dict):
+
+        if "dataImages" in obj:
+            return obj
+
+        children = obj.values()
+
+    elif isinstance(obj, list):
+        children = obj
+
+    else:
+        return None
+
+    for child in children:
+
+        found = find_images(child)
+
+        if found is not None:
+            return found
+
+    return None
+
+
+async def close_image_meta():
+    global meta_executor, meta_cache
+
+    for task in list(background_tasks):
+        task.cancel()
+
+    if meta_executor is not None:
+        meta_executor.shutdown(wait=False, cancel_futures=True)
+
+    meta_executor = None
+    meta_cache = None
+
+
+async def close_clients():
+    global client, image_client
+
+    for c in (client, image_client):
+        if c is not None:
+            await c.aclose()
+
+    client = None
+    image_client = None
+
+
+# ====================================
+# CACHES
+# ====================================
+
+# Satu backend dipakai bersama, dipisah per namespace
+cache_backend: CacheBackend | None = None
+
+response_cache: Cache | None = None
+
+image_cache: Cache | None = None
+
+render_cache: Cache | None = None
+
+negative_cache: NegativeCache | None = None
+
+
+def get_cache_backend() -> CacheBackend:
+    global cache_backend
+
+    if cache_backend is None:
+        cache_backend = backend_from_env()
+
+    return cache_backend
+
+
+def get_response_cache() -> Cache:
+    """Cache body JSON upstream per URL"""
+    global response_cache
+
+    if response_cache is None:
+        response_cache = Cache(get_cache_backend(), "resp")
+
+    return response_cache
+
+
+def get_image_cache() -> Cache:
+    """Cache gambar proxy per URL (content-type + bytes)"""
+    global image_cache
+
+    if image_cache is None:
+        image_cache = Cache(get_cache_backend(), "img")
+
+    return image_cache
+
+
+def get_render_cache() -> Cache:
+    """Cache body JSON hasil route (plus varian terkompresi) per route + params"""
+    global render_cache
+
+    if render_cache is None:
+        render_cache = Cache(get_cache_backend(), "out")
+
+    return render_cache
+
+
+def get_negative_cache() -> NegativeCache:
+    global negative_cache
+
+    if negative_cache is None:
+        negative_cache = NegativeCache(NEGATIVE_404_TTL, NEGATIVE_ERROR_TTL)
+
+    return negative_cache
+
+
+async def close_caches():
+    global cache_backend, response_cache, image_cache, render_cache, series_feed
+
+    if cache_backend is not None:
+        await cache_backend.close()
+
+    cache_backend = None
+    response_cache = None
+    image_cache = None
+    render_cache = None
+
+    # feed dan limiter shared memegang referensi ke backend yang sudah ditutup
+    series_feed = None
+    rate_limiters.clear()
+
+
+# ====================================
+# SERIES FEED
+# ====================================
+
+series_feed: SeriesFeed | None = None
+
+
+def series_page_url(page: int) -> str:
+    return (
+        f"{BASE}/series"
+        f"?preset=rilisan_terbaru"
+        f"&take={SOURCE_PAGE_SIZE}"
+        f"&takeChapter=3"
+        f"&page={page}"
+    )
+
+
+async def fetch_feed_head(fresh: bool = True) -> list:
+    """
+    Head rilisan_terbaru. Poll background (`fresh`) mengambil langsung dari
+    upstream lalu memperbarui response cache, jadi /series ikut segar. Poll
+    inline dari request (tanpa background task, mis. di serverless) memakai
+    response cache yang sama dengan /series, tanpa request tambahan ke upstream.
+    """
+
+    pages = -(-FEED_HEAD_SIZE // SOURCE_PAGE_SIZE)
+
+    async def page_body(url: str) -> bytes:
+
+        if not fresh:
+            return await fetch_bytes(url)
+
+        body = await fetch_upstream(url)
+        await get_response_cache().set(url, body, RESPONSE_CACHE_TTL)
+
+        return body
+
+    bodies = await asyncio.gather(*[
+        page_body(series_page_url(page)) for page in range(1, pages + 1)
+    ])
+
+    items = []
+
+    for body in bodies:
+        items.extend(json.loads(body).get("data") or [])
+
+    return items[:FEED_HEAD_SIZE]
+
+
+def get_series_feed() -> SeriesFeed:
+    global series_feed
+
+    if series_feed is None:
+        series_feed = SeriesFeed(get_cache_backend(), fetch_feed_head, FEED_POLL_INTERVAL)
+
+    return series_feed
+
+
+# ====================================
+# RELEASE STREAM HUB
+# ====================================
+
+stream_hub: Broadcaster | None = None
+
+
+def get_stream_hub() -> Broadcaster:
+    global stream_hub
+
+    if stream_hub is None:
+        stream_hub = Broadcaster(STREAM_QUEUE_SIZE, STREAM_MAX_SUBSCRIBERS, STREAM_MAX_PER_CLIENT)
+
+    return stream_hub
+
+
+def release_event(token: str, items: list) -> Event:
+    """Render sekali untuk semua subscriber"""
+
+    # base URL proxy tidak bergantung request (lihat get_base_url)
+    items = proxify_images(clean(items), get_base_url(None))
+
+    return Event(token, "release", render_json({"token": token, "count": len(items), "data": items}))
+
+
+async def watch_feed():
+    """
+    Satu loop per worker: baca snapshot feed (murah, tanpa upstream) dan
+    publish item yang berubah ke semua subscriber.
+    """
+
+    feed = get_series_feed()
+    hub = get_stream_hub()
+
+    token = None
+
+    while True:
+
+        try:
+
+            state = await feed.load()
+
+            if state is not None:
+
+                if token is not None and hub.subscribers:
+
+                    items, _, reset = feed.changes_since(state, token)
+
+                    if items and not reset:
+                        hub.publish(release_event(feed.token(state), items))
+
+                token = feed.token(state)
+
+        except Exception:
+            pass
+
+        await asyncio.sleep(STREAM_WATCH_INTERVAL)
+
+
+# ====================================
+# RATE LIMIT
+# ====================================
+
+rate_limiters: dict[str, TokenBucket] = {}
+
+
+def get_rate_limiter(name: str) -> TokenBucket:
+
+    if name not in rate_limiters:
+
+        rate, burst = RATE_LIMIT_PROXY if name == "proxy" else RATE_LIMIT_JSON
+
+        if RATE_LIMIT_SHARED:
+            rate_limiters[name] = SharedTokenBucket(get_cache_backend(), name, rate, burst)
+        else:
+            rate_limiters[name] = TokenBucket(rate, burst)
+
+    return rate_limiters[name]
+
+
+def rate_limit_bucket(scope) -> TokenBucket | None:
+    """Bucket untuk request ini; root dan dokumentasi tidak dibatasi"""
+
+    path = scope["path"]
+
+    if path == "/proxy":
+        return get_rate_limiter("proxy")
+
+    if path.startswith("/series"):
+        return get_rate_limiter("json")
+
+    return None
+
+
+def client_key(scope) -> str:
+    """API key kalau terdaftar, kalau tidak IP client"""
+
+    headers = dict(scope["headers"])
+
+    api_key = headers.get(b"x-api-key")
+
+    if api_key and api_key.decode("latin-1") in API_KEYS:
+        return "key:" + api_key.decode("latin-1")
+
+    if TRUST_PROXY_HEADERS:
+
+        forwarded = headers.get(b"x-forwarded-for")
+
+        if forwarded:
+            hops = [hop.strip() for hop in forwarded.decode("latin-1").split(",") if hop.strip()]
+
+            if hops:
+                return "ip:" + hops[-min(TRUSTED_PROXY_HOPS, len(hops))]
+
+        real_ip = headers.get(b"x-real-ip")
+
+        if real_ip:
+            return "ip:" + real_ip.decode("latin-1").strip()
+
+    client = scope.get("client")
+
+    return "ip:" + (client[0] if client else "unknown")
+
+
+async def prewarm():
+    """Buka koneksi TLS ke upstream sebelum request pertama"""
+
+    try:
+        await get_client().head(BASE)
+    except httpx.RequestError:
+        pass
+
 
 # ====================================
 # PROXY URL HELPER
@@ -110,64 +728,471 @@ def proxify_images(obj: Any, base_url: str):
 # CLEAN FUNCTION
 # ====================================
 
-def clean(obj: Any):
+def clean(obj: Any):
+
+    if isinstance(obj, dict):
+
+        result = {}
+
+        for k, v in obj.items():
+
+            if v is None:
+                continue
+
+            if v == "":
+                continue
+
+            result[k] = clean(v)
+
+        return result
+
+    elif isinstance(obj, list):
+
+        return [clean(x) for x in obj]
+
+    return obj
+
+
+# ====================================
+# FIELD PROJECTION (?fields=)
+# ====================================
+
+@functools.lru_cache(maxsize=256)
+def compile_fields(fields: str | None):
+    """
+    Compile "data.title,data.slug,chapters.data.index" jadi tree
+    {"data": {"title": None, "slug": None}, "chapters": {"data": {"index": None}}}.
+    None artinya ambil seluruh value. Di-cache per string `fields`.
+    """
+
+    if not fields:
+        return None
+
+    tree = {}
+
+    for path in fields.split(","):
+
+        keys = [k.strip() for k in path.split(".") if k.strip()]
+
+        if not keys:
+            continue
+
+        node = tree
+
+        for key in keys[:-1]:
+
+            child = node.setdefault(key, {})
+
+            # path yang lebih pendek sudah ambil semuanya
+            if child is None:
+                break
+
+            node = child
+
+        else:
+            node[keys[-1]] = None
+
+    return tree or None
+
+
+def project(obj: Any, tree):
+    """Ambil hanya path di `tree`; list diproyeksikan per item. Subtree lain tidak disentuh."""
+
+    if tree is None:
+        return obj
+
+    if isinstance(obj, list):
+        return [project(x, tree) for x in obj]
+
+    if isinstance(obj, dict):
+        return {k: project(obj[k], sub) for k, sub in tree.items() if k in obj}
+
+    return obj
+
+
+FIELDS_QUERY = Query(
+    None,
+    description="Field yang diambil dari data upstream, dipisah koma, nested pakai titik "
+                "(contoh: data.title,data.slug,data.coverImage,chapters.data.index). "
+                "Untuk /series dan halaman chapter (offset/take/order/number) berlaku per item."
+)
+
+
+# ====================================
+# UPSTREAM LATENCY & RETRY BUDGET
+# ====================================
+
+# Hedging: kalau request pertama belum selesai setelah delay ~p95,
+# kirim request kedua dan ambil yang duluan selesai
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+HEDGE_DEFAULT_DELAY = 0.5
+HEDGE_MIN_DELAY = 0.05
+HEDGE_MAX_DELAY = 2.0
+
+# Retry dengan full jitter, dibatasi retry budget global
+MAX_RETRIES = 2
+RETRY_BASE_DELAY = 0.1
+
+
+class LatencyTracker:
+    """Rolling window latency upstream untuk hitung delay hedge (p95)"""
+
+    def __init__(self, size: int = 256, min_samples: int = 20):
+        self.samples = deque(maxlen=size)
+        self.min_samples = min_samples
+        self._p95 = None
+        self._dirty = 0
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+        self._dirty += 1
+
+    def p95(self):
+        if len(self.samples) < self.min_samples:
+            return None
+
+        # sort ulang hanya tiap beberapa sample, bukan tiap request
+        if self._p95 is None or self._dirty >= 16:
+            ordered = sorted(self.samples)
+            self._p95 = ordered[int(len(ordered) * 0.95) - 1]
+            self._dirty = 0
+
+        return self._p95
+
+    def hedge_delay(self) -> float:
+        p95 = self.p95()
+
+        if p95 is None:
+            return HEDGE_DEFAULT_DELAY
+
+        return min(max(p95, HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+
+class RetryBudget:
+    """
+    Budget global untuk retry dan hedge.
+    Setiap request menabung `ratio` token, setiap retry/hedge memakai 1 token,
+    jadi saat upstream down retry tidak bisa melipatgandakan traffic.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_tokens: float = 10.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = min_tokens
+
+    def deposit(self):
+        self.tokens = min(self.tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
+
+
+latency = LatencyTracker()
+
+retry_budget = RetryBudget()
+
+
+async def timed_get(http: httpx.AsyncClient, url: str, **kwargs):
+    """Satu GET ke upstream, catat latency-nya"""
+
+    start = time.perf_counter()
+
+    r = await http.get(url, **kwargs)
+
+    latency.observe(time.perf_counter() - start)
+
+    return r
+
+
+async def hedged_get(http: httpx.AsyncClient, url: str, **kwargs):
+    """GET dengan hedging: request kedua dikirim kalau yang pertama lambat"""
+
+    first = asyncio.create_task(timed_get(http, url, **kwargs))
+
+    if not HEDGE_ENABLED:
+        return await first
+
+    done, _ = await asyncio.wait({first}, timeout=latency.hedge_delay())
+
+    if done or not retry_budget.withdraw():
+        return await first
+
+    pending = {first, asyncio.create_task(timed_get(http, url, **kwargs))}
+
+    error = None
+
+    try:
+
+        while pending:
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+
+                if task.exception() is None:
+                    return task.result()
+
+                error = error or task.exception()
+
+        raise error
+
+    finally:
+
+        for task in pending:
+            task.cancel()
+
+
+async def upstream_get(http: httpx.AsyncClient, url: str, **kwargs):
+    """
+    GET idempotent ke upstream dengan hedging + jittered retry.
+    Retry hanya untuk network error dan 5xx, selama budget masih ada.
+    """
+
+    retry_budget.deposit()
+
+    attempt = 0
+
+    while True:
+
+        try:
+
+            r = await hedged_get(http, url, **kwargs)
+
+            if r.status_code < 500 or attempt >= MAX_RETRIES or not retry_budget.withdraw():
+                return r
+
+        except httpx.RequestError:
+
+            if attempt >= MAX_RETRIES or not retry_budget.withdraw():
+                raise
+
+        attempt += 1
+
+        # full jitter: sleep random antara 0 dan base * 2^attempt
+        await asyncio.sleep(random.uniform(0, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+# ====================================
+# FETCH FUNCTION
+# ====================================
+
+async def fetch_upstream(url: str) -> bytes:
+
+    try:
+
+        r = await upstream_get(get_client(), url)
+
+        if r.status_code != 200:
+
+            raise HTTPException(
+                status_code=r.status_code,
+                detail="Source error"
+            )
+
+        return r.content
+
+    except httpx.RequestError:
+
+        raise HTTPException(
+            status_code=500,
+            detail="Network error"
+        )
+
+
+async def fetch_bytes(url: str) -> bytes:
+    """Body upstream (lewat negative cache + response cache), belum di-parse"""
+
+    negative = get_negative_cache()
+
+    async def fill():
+
+        # negative cache hanya dicek saat response cache miss: false positive
+        # Bloom tidak bisa membuat 404 untuk body yang masih ter-cache.
+        # Slug yang baru saja 404 / upstream yang terus error tidak dipanggil ulang
+        cached_error = negative.check(url)
+
+        if cached_error is not None:
+
+            raise HTTPException(
+                status_code=cached_error[0],
+                detail=cached_error[1]
+            )
+
+        try:
+            return await fetch_upstream(url)
+
+        # dicatat oleh pengisi saja: caller yang menunggu fill yang sama
+        # menerima error yang sama tapi tidak menambah hitungan gagal
+        except HTTPException as e:
+            negative.record(url, e.status_code, e.detail)
+            raise
+
+    # hanya response 200 yang masuk cache; error tetap dilempar ke caller
+    body = await get_response_cache().get_or_fill(url, RESPONSE_CACHE_TTL, fill)
+
+    negative.forget(url)
+
+    return body
+
+
+async def fetch(url: str):
+
+    return json.loads(await fetch_bytes(url))
+
+
+# ====================================
+# JSON RESPONSE & COMPRESSION
+# ====================================
+
+def render_json(data: Any) -> bytes:
+
+    # route boleh mengembalikan body yang sudah di-encode (lihat records.py)
+    if isinstance(data, bytes):
+        return data
+
+    # sama dengan JSONResponse bawaan Starlette
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+compress_executor: ThreadPoolExecutor | None = None
+
+
+async def compress_body(body: bytes, encoding: str, profile: str = "fast") -> bytes:
+    """Body kecil dikompresi langsung; body besar di thread pool (zlib/brotli/zstd melepas GIL)"""
+    global compress_executor
+
+    if len(body) < COMPRESS_OFFLOAD_SIZE:
+        return compress(body, encoding, profile)
+
+    if compress_executor is None:
+        compress_executor = ThreadPoolExecutor(COMPRESS_WORKERS, thread_name_prefix="compress")
+
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(compress_executor, compress, body, encoding, profile)
+
+
+def close_compress():
+    global compress_executor
+
+    if compress_executor is not None:
+        compress_executor.shutdown(wait=False, cancel_futures=True)
+
+    compress_executor = None
+
+
+def json_response(cache: bool = True, headers: bool = False):
+    """
+    Decorator route JSON: render body, negosiasi gzip/br/zstd.
+    Kalau `cache`, body dan varian terkompresinya disimpan di render cache,
+    jadi response yang sering diminta tidak di-render/kompres ulang.
+    Kalau `headers`, header tambahan dari `request.state.headers` ikut di-cache.
+    Route bisa mengisi `request.state.cacheable = False` supaya response
+    yang belum lengkap tidak disimpan.
+    """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        async def wrapper(request: Request, **kwargs):
+
+            encoding = negotiate(request.headers.get("accept-encoding", ""))
+
+            if not cache:
+
+                body = render_json(await func(request=request, **kwargs))
+
+                compressed = None
+
+                if encoding and len(body) >= COMPRESS_MIN_SIZE:
+                    compressed = await compress_body(body, encoding)
+
+                return encoded_response(body, encoding, compressed, getattr(request.state, "headers", None))
+
+            # key dari parameter yang sudah divalidasi, bukan query string mentah;
+            # value di-escape supaya "&" / "=" di dalamnya tidak bisa meniru parameter lain,
+            # dan parameter None tidak ditulis (beda dengan string "None")
+            key = func.__name__ + "?" + "&".join(
+                f"{k}={quote(str(kwargs[k]), safe='')}" for k in sorted(kwargs) if kwargs[k] is not None
+            )
+
+            cached = get_render_cache()
+
+            async def fill():
+
+                body = render_json(await func(request=request, **kwargs))
 
-    if isinstance(obj, dict):
+                # disimpan sebelum body, jadi selalu ada saat body sudah ter-cache
+                if headers and storable(body):
+                    extra = render_json(getattr(request.state, "headers", {}))
+                    await cached.set(f"{key}|headers", extra, RESPONSE_CACHE_TTL)
 
-        result = {}
+                return body
 
-        for k, v in obj.items():
+            def storable(body: bytes) -> bool:
+                return getattr(request.state, "cacheable", True)
 
-            if v is None:
-                continue
+            body = await cached.get_or_fill(key, RESPONSE_CACHE_TTL, fill, storable)
 
-            if v == "":
-                continue
+            extra = None
 
-            result[k] = clean(v)
+            if headers:
+                raw = await cached.get(f"{key}|headers")
+                extra = json.loads(raw) if raw else getattr(request.state, "headers", None)
 
-        return result
+            compressed = None
 
-    elif isinstance(obj, list):
+            if encoding and len(body) >= COMPRESS_MIN_SIZE:
 
-        return [clean(x) for x in obj]
+                # crc di key: varian lama otomatis tidak terpakai saat body berubah
+                variant = f"{key}|{encoding}|{zlib.crc32(body)}"
 
-    return obj
+                async def fill_variant():
+                    return await compress_body(body, encoding, "cached")
 
+                compressed = await cached.get_or_fill(variant, RESPONSE_CACHE_TTL, fill_variant)
 
-# ====================================
-# FETCH FUNCTION
-# ====================================
+            return encoded_response(body, encoding, compressed, extra)
 
-async def fetch(url: str):
+        return wrapper
 
-    try:
+    return decorator
 
-        r = await client.get(url)
 
-        if r.status_code != 200:
+def encoded_response(
+    body: bytes,
+    encoding: str | None,
+    compressed: bytes | None,
+    extra: dict | None = None
+) -> Response:
 
-            raise HTTPException(
-                status_code=r.status_code,
-                detail="Source error"
-            )
+    headers = {"Vary": "Accept-Encoding", **(extra or {})}
 
-        return r.json()
+    if compressed is None:
+        return Response(content=body, media_type="application/json", headers=headers)
 
-    except httpx.RequestError:
+    headers["Content-Encoding"] = encoding
 
-        raise HTTPException(
-            status_code=500,
-            detail="Network error"
-        )
+    return Response(content=compressed, media_type="application/json", headers=headers)
 
 
 # ====================================
 # ROOT
 # ====================================
 
-@app.get("/")
-async def root():
+@router.get("/")
+@json_response(cache=False)
+async def root(request: Request):
 
     return {
         "status": 200,
@@ -179,11 +1204,13 @@ async def root():
 # SERIES LIST (OFFSET PAGINATION)
 # ====================================
 
-@app.get("/series")
+@router.get("/series")
+@json_response()
 async def series(
     request: Request,
     offset: int = Query(0, ge=0),
-    take: int = Query(20, ge=1, le=100)
+    take: int = Query(20, ge=1, le=100),
+    fields: str | None = FIELDS_QUERY
 ):
 
     # hitung page awal
@@ -192,25 +1219,19 @@ async def series(
     # index mulai di page tersebut
     start_index = offset % SOURCE_PAGE_SIZE
 
+    projection = compile_fields(fields)
+
+    # tanpa fields: JSON per item yang sudah jadi; dengan fields: item mentah,
+    # diproyeksikan dulu supaya clean/proxify hanya menyentuh field yang diminta
+    load_page = series_page if projection is None else series_page_items
+
     results = []
 
     page = start_page
 
     while len(results) < take:
 
-        url = (
-            f"{BASE}/series"
-            f"?preset=rilisan_terbaru"
-            f"&take={SOURCE_PAGE_SIZE}"
-            f"&takeChapter=3"
-            f"&page={page}"
-        )
-
-        raw = await fetch(url)
-
-        cleaned = clean(raw)
-
-        items = cleaned.get("data", [])
+        items = await load_page(request, page)
 
         if not items:
             break
@@ -228,33 +1249,221 @@ async def series(
 
     # potong sesuai take
     results = results[:take]
-    
-    # Proxify semua image URLs
-    base_url = get_base_url(request)
-    results = proxify_images(results, base_url)
 
-    return {
+    envelope = {
         "status": 200,
         "offset": offset,
         "take": take,
         "count": len(results),
         "hasMore": len(results) == take,
-        "data": results
     }
 
+    # tanpa fields: rakit bytes langsung dari JSON per item, tanpa dict perantara
+    if projection is None:
+        return encode_series_list(render_json(envelope), results)
+
+    base_url = get_base_url(request)
+
+    envelope["data"] = [proxify_images(clean(project(item, projection)), base_url) for item in results]
+
+    return envelope
+
+
+async def series_page_items(request: Request, page: int) -> list:
+    """Satu halaman upstream rilisan_terbaru sebagai item mentah (untuk ?fields=)"""
+
+    return series_items(await fetch_bytes(series_page_url(page)))
+
+
+# page -> (crc body upstream, JSON per item, total bytes JSON)
+series_pages: OrderedDict[int, tuple[int, tuple, int]] = OrderedDict()
+
+
+async def series_page(request: Request, page: int) -> tuple:
+    """Satu halaman upstream rilisan_terbaru sebagai JSON per item (sudah clean + proxify)"""
+
+    # body dari response cache; JSON per item dibangun ulang hanya saat body berubah
+    body = await fetch_bytes(series_page_url(page))
+
+    crc = zlib.crc32(body)
+
+    cached = series_pages.get(page)
+
+    if cached is not None and cached[0] == crc:
+        series_pages.move_to_end(page)
+        return cached[1]
+
+    base_url = get_base_url(request)
+
+    entries = decode_series_page(body, lambda item: render_json(proxify_images(clean(item), base_url)))
+
+    series_pages.pop(page, None)
+    series_pages[page] = (crc, entries, sum(len(entry) for entry in entries))
+
+    size = sum(c[2] for c in series_pages.values())
+
+    while len(series_pages) > 1 and (len(series_pages) > SERIES_PAGE_CACHE_SIZE or size > SERIES_PAGE_CACHE_MAX_BYTES):
+        size -= series_pages.popitem(last=False)[1][2]
+
+    return entries
+
+
+# ====================================
+# SERIES UPDATES (DELTA FEED)
+# ====================================
+
+@router.get("/series/updates")
+@json_response(cache=False)
+async def series_updates(
+    request: Request,
+    since: str | None = Query(None, description="Token dari response sebelumnya"),
+    fields: str | None = FIELDS_QUERY
+):
+    """
+    Item rilisan terbaru yang berubah (series baru / chapter baru) sejak `since`.
+    Dilayani dari snapshot poller, tidak memanggil upstream per request.
+    Tanpa `since` atau token kadaluarsa: seluruh snapshot + `reset: true`.
+    """
+
+    feed = get_series_feed()
+
+    state = await feed.ensure_fresh()
+
+    items, token, reset = feed.changes_since(state, since)
+
+    items = clean(project(items, compile_fields(fields)))
+
+    base_url = get_base_url(request)
+    items = proxify_images(items, base_url)
+
+    return {
+        "status": 200,
+        "token": token,
+        "reset": reset,
+        "count": len(items),
+        "data": items
+    }
+
+
+# ====================================
+# SERIES STREAM (SSE / WEBSOCKET)
+# ====================================
+
+@router.get("/series/stream")
+async def series_stream(request: Request):
+    """
+    Server-Sent Events: `event: release` berisi item rilisan yang berubah.
+    Event pertama `ready` membawa token saat ini; kirim balik lewat header
+    Last-Event-ID saat reconnect untuk menerima perubahan yang terlewat.
+    """
+
+    feed = get_series_feed()
+    hub = get_stream_hub()
+
+    state = await feed.load()
+
+    backlog = []
+
+    if state is not None:
+
+        token = feed.token(state)
+
+        last = request.headers.get("last-event-id")
+
+        if last:
+            items, _, reset = feed.changes_since(state, last)
+
+            if items and not reset:
+                backlog.append(release_event(token, items))
+
+        if not backlog:
+            backlog.append(Event(token, "ready", render_json({"token": token})))
+
+    sub = hub.subscribe(client_key(request.scope))
+
+    if sub is None:
+        raise HTTPException(status_code=503, detail="Too many stream subscribers")
+
+    return StreamingResponse(
+        sse_stream(hub, sub, backlog, STREAM_HEARTBEAT),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+async def wait_disconnect(websocket: WebSocket):
+    """Selesai saat client menutup koneksi (pesan dari client diabaikan)"""
+
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/series/ws")
+async def series_ws(websocket: WebSocket):
+    """WebSocket: setiap pesan text adalah JSON event release yang sama dengan SSE"""
+
+    hub = get_stream_hub()
+
+    sub = hub.subscribe(client_key(websocket.scope))
+
+    if sub is None:
+        await websocket.close(code=1013)
+        return
+
+    closed = None
+
+    try:
+
+        await websocket.accept()
+
+        # client yang disconnect langsung dilepas, tidak menunggu event berikutnya
+        closed = asyncio.create_task(wait_disconnect(websocket))
+
+        while True:
+
+            getter = asyncio.create_task(sub.queue.get())
+
+            await asyncio.wait({getter, closed}, return_when=asyncio.FIRST_COMPLETED)
+
+            if not getter.done():
+                getter.cancel()
+                return
+
+            event = getter.result()
+
+            # di-drop karena terlalu lambat
+            if event is None:
+                await websocket.close(code=1013)
+                return
+
+            await websocket.send_text(event.data.decode())
+
+    except WebSocketDisconnect:
+        pass
+
+    finally:
+        if closed is not None:
+            closed.cancel()
+
+        hub.unsubscribe(sub)
+
 
 # ====================================
 # SERIES DETAIL
 # ====================================
 
-@app.get("/series/{slug}")
-async def series_detail(request: Request, slug: str):
+@router.get("/series/{slug}")
+@json_response()
+async def series_detail(request: Request, slug: str, fields: str | None = FIELDS_QUERY):
 
     url = f"{BASE}/series/{slug}"
 
     raw = await fetch(url)
     
-    cleaned = clean(raw)
+    cleaned = clean(project(raw, compile_fields(fields)))
     
     # Proxify semua image URLs
     base_url = get_base_url(request)
@@ -267,39 +1476,196 @@ async def series_detail(request: Request, slug: str):
 # CHAPTER LIST
 # ====================================
 
-@app.get("/series/{slug}/chapters")
-async def chapters(request: Request, slug: str):
+class ChapterIndex:
+    """
+    Chapter list satu series yang sudah di-clean + proxify, urut nomor
+    chapter terbesar duluan. `keys` (naik) dipakai bisect untuk lookup
+    nomor chapter, jadi satu halaman O(log n + take).
+    """
 
-    url = f"{BASE}/series/{slug}/chapters"
+    __slots__ = ("entries", "keys", "crc", "size")
 
-    raw = await fetch(url)
-    
-    cleaned = clean(raw)
-    
-    # Proxify semua image URLs
-    base_url = get_base_url(request)
-    cleaned = proxify_images(cleaned, base_url)
+    def __init__(self, entries: list, crc: int, size: int):
 
-    return cleaned
+        numbered = [(chapter_number(e), e) for e in entries]
+
+        # chapter tanpa nomor ditaruh paling akhir (urutan upstream dipertahankan)
+        numbered.sort(key=lambda pair: float("-inf") if pair[0] is None else pair[0], reverse=True)
+
+        self.entries = [e for _, e in numbered]
+        self.keys = [float("-inf") if n is None else n for n, _ in reversed(numbered)]
+
+        # crc body upstream asal index; index dibangun ulang saat body di response cache berubah
+        self.crc = crc
+        self.size = size
+
+    def start(self, number: float | None, order: str) -> int:
+        """Posisi chapter `number` (atau terdekat berikutnya) dalam urutan `order`"""
+
+        if number is None:
+            return 0
+
+        if order == "asc":
+            return bisect_left(self.keys, number)
+
+        return len(self.keys) - bisect_right(self.keys, number)
+
+    def page(self, start: int, take: int, order: str) -> list:
+
+        total = len(self.entries)
+
+        if order == "asc":
+            end = max(total - start, 0)
+            return self.entries[max(end - take, 0):end][::-1]
+
+        return self.entries[start:start + take]
+
+
+chapter_indexes: OrderedDict[str, ChapterIndex] = OrderedDict()
+
+
+async def get_chapter_index(request: Request, slug: str) -> tuple[ChapterIndex | None, Any]:
+    """Return (index, body upstream yang sudah di-clean + proxify)"""
+
+    # body dari response cache: index tidak hidup lebih lama dari entry upstream-nya
+    body = await fetch_bytes(f"{BASE}/series/{slug}/chapters")
+
+    crc = zlib.crc32(body)
+
+    index = chapter_indexes.get(slug)
+
+    if index is not None and index.crc == crc:
+        chapter_indexes.move_to_end(slug)
+        return index, None
+
+    cleaned = proxify_images(clean(json.loads(body)), get_base_url(request))
+
+    entries = cleaned.get("data") if isinstance(cleaned, dict) else None
+
+    # bentuk response di luar dugaan: tidak bisa dipaginasi
+    if not isinstance(entries, list):
+        return None, cleaned
+
+    index = ChapterIndex(entries, crc, len(body))
+
+    chapter_indexes.pop(slug, None)
+    chapter_indexes[slug] = index
+
+    size = sum(i.size for i in chapter_indexes.values())
+
+    while len(chapter_indexes) > 1 and (len(chapter_indexes) > CHAPTER_INDEX_SIZE or size > CHAPTER_INDEX_MAX_BYTES):
+        size -= chapter_indexes.popitem(last=False)[1].size
+
+    return index, cleaned
+
+
+@router.get("/series/{slug}/chapters")
+@json_response()
+async def chapters(
+    request: Request,
+    slug: str,
+    offset: int | None = Query(None, ge=0),
+    take: int | None = Query(None, ge=1, le=500),
+    order: str | None = Query(None, pattern="^(asc|desc)$", description="desc = chapter terbaru duluan"),
+    number: float | None = Query(None, description="Mulai dari chapter nomor ini (atau terdekat)"),
+    fields: str | None = FIELDS_QUERY
+):
+
+    # tanpa parameter paginasi: response lengkap seperti sebelumnya
+    if offset is None and take is None and order is None and number is None:
+
+        url = f"{BASE}/series/{slug}/chapters"
+
+        raw = await fetch(url)
+        
+        cleaned = clean(project(raw, compile_fields(fields)))
+        
+        # Proxify semua image URLs
+        base_url = get_base_url(request)
+        cleaned = proxify_images(cleaned, base_url)
+
+        return cleaned
+
+    index, cleaned = await get_chapter_index(request, slug)
+
+    if index is None:
+        return project(cleaned, compile_fields(fields))
+
+    offset = offset or 0
+    take = take or 30
+    order = order or "desc"
+
+    start = index.start(number, order) + offset
+
+    results = project(index.page(start, take, order), compile_fields(fields))
+
+    return {
+        "status": 200,
+        "offset": offset,
+        "take": take,
+        "order": order,
+        "total": len(index.entries),
+        "count": len(results),
+        "hasMore": start + len(results) < len(index.entries),
+        "data": results
+    }
 
 
 # ====================================
 # CHAPTER DETAIL
 # ====================================
 
-@app.get("/series/{slug}/chapters/{chapter}")
-async def chapter_detail(request: Request, slug: str, chapter: str):
+@router.get("/series/{slug}/chapters/{chapter}")
+@json_response(headers=True)
+async def chapter_detail(
+    request: Request,
+    slug: str,
+    chapter: str,
+    meta: bool = Query(False, description="Tambahkan dataImagesMeta: width, height, bytes, placeholder per gambar"),
+    fields: str | None = FIELDS_QUERY
+):
 
     url = f"{BASE}/series/{slug}/chapters/{chapter}"
 
     raw = await fetch(url)
     
-    cleaned = clean(raw)
+    cleaned = clean(project(raw, compile_fields(fields)))
+
+    holder = find_images(cleaned)
+
+    images = []
+
+    if holder is not None:
+
+        images = holder["dataImages"]
+
+        # dataImages bisa list atau object dengan key numerik
+        if isinstance(images, dict):
+            images = [images[k] for k in sorted(images, key=lambda k: int(k) if str(k).isdigit() else 0)]
+
+        images = [img for img in images if isinstance(img, str)]
+
+        if meta:
+            holder["dataImagesMeta"], complete = await chapter_images_meta(images)
+
+            # sebagian gambar belum lewat /proxy: jangan di-cache, request
+            # berikutnya mengambil metadata yang sudah ada
+            if not complete:
+                request.state.cacheable = False
     
     # Proxify semua image URLs
     base_url = get_base_url(request)
     cleaned = proxify_images(cleaned, base_url)
 
+    # Halaman pertama di-preload browser sebelum JSON selesai diproses
+    if images and IMAGE_PRELOAD_COUNT > 0:
+        request.state.headers = {
+            "Link": ", ".join(
+                f"<{proxify_url(img, base_url)}>; rel=preload; as=image"
+                for img in images[:IMAGE_PRELOAD_COUNT]
+            )
+        }
+
     return cleaned
 
 
@@ -307,7 +1673,52 @@ async def chapter_detail(request: Request, slug: str, chapter: str):
 # IMAGE PROXY
 # ====================================
 
-@app.get("/proxy")
+async def fetch_image(url: str, referer: str) -> bytes:
+    """Fetch gambar dari upstream, return `content-type\\n` + bytes untuk disimpan di cache"""
+
+    negative = get_negative_cache()
+
+    # gambar yang baru saja 404 / CDN yang terus error tidak dipanggil ulang
+    cached_error = negative.check(url)
+
+    if cached_error is not None:
+        raise HTTPException(status_code=cached_error[0], detail=cached_error[1])
+
+    # GET biasa, tanpa hedging/retry: gambar besar dan lambat akan melewati p95
+    # request JSON dan menghabiskan retry budget yang dipakai bersama
+    response = await get_image_client().get(
+        url,
+        headers={"Referer": referer},
+    )
+    
+    if response.status_code != 200:
+        # Log error untuk debugging
+        error_detail = f"Status {response.status_code}"
+        if response.status_code == 403:
+            error_detail = f"403 Forbidden - URL: {url[:100]}, Referer: {referer}"
+
+        negative.record(url, response.status_code, error_detail)
+
+        # metadata gambar ini diketahui "tidak ada" selama negative cache berlaku
+        failed_ttl = NEGATIVE_404_TTL if response.status_code == 404 else NEGATIVE_ERROR_TTL
+        await get_meta_cache().set(url, IMAGE_META_FAILED, failed_ttl)
+
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=error_detail
+        )
+
+    negative.forget(url)
+
+    content_type = response.headers.get("content-type", "image/jpeg")
+
+    # gambar baru masuk cache: hitung metadata sekali, tanpa menahan response
+    queue_image_meta(url, response.content)
+
+    return content_type.encode() + b"\n" + response.content
+
+
+@router.get("/proxy")
 async def proxy_image(
     url: str = Query(..., description="Image URL to proxy"),
     referer: str = Query(None, description="Custom referer header")
@@ -323,72 +1734,57 @@ async def proxy_image(
     
     # Validasi URL aman (block localhost/private IP)
     try:
-        from urllib.parse import urlparse
         parsed = urlparse(url)
         hostname = parsed.hostname.lower() if parsed.hostname else ""
-        
-        # Block private addresses
-        private_patterns = [
-            "127.", "10.", "172.16.", "172.17.", "172.18.", "172.19.",
-            "172.20.", "172.21.", "172.22.", "172.23.", "172.24.", "172.25.",
-            "172.26.", "172.27.", "172.28.", "172.29.", "172.30.", "172.31.",
-            "192.168.", "169.254.", "localhost", "0."
-        ]
-        
-        if any(hostname.startswith(p) for p in private_patterns):
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid URL: {str(e)}")
+
+    if parsed.scheme not in ["http", "https"]:
+        raise HTTPException(status_code=400, detail="Invalid URL scheme")
+
+    if not hostname:
+        raise HTTPException(status_code=400, detail="Invalid URL: missing host")
+
+    # Host komikcast yang dikenal langsung lolos; host lain di-resolve
+    # (cached) dan semua IP-nya harus alamat publik
+    if not is_allowed_image_host(hostname):
+
+        try:
+            await get_resolver().resolve(hostname)
+        except BlockedHostError:
             raise HTTPException(
                 status_code=400,
                 detail="Access to internal networks is prohibited"
             )
-        
-        if parsed.scheme not in ["http", "https"]:
-            raise HTTPException(status_code=400, detail="Invalid URL scheme")
-            
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid URL: {str(e)}")
+        except OSError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid URL: {str(e)}")
+
+    count_image_host(hostname)
     
     # Set referer default - gunakan referer yang sama dengan Weebs_Scraper
     if not referer:
         # Default referer yang work untuk komikcast images
         referer = "https://v1.komikcast.fit"
     
-    # Fetch gambar dengan header yang sesuai
+    # Fetch gambar dengan header yang sesuai (lewat cache)
     try:
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as proxy_client:
-            response = await proxy_client.get(
-                url,
-                headers={
-                    "Referer": referer,
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-                    "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.9",
-                    "Accept-Encoding": "gzip, deflate, br",
-                    "Connection": "keep-alive",
-                    "Sec-Fetch-Dest": "image",
-                    "Sec-Fetch-Mode": "no-cors",
-                    "Sec-Fetch-Site": "cross-site",
-                },
-            )
-            
-            if response.status_code != 200:
-                # Log error untuk debugging
-                error_detail = f"Status {response.status_code}"
-                if response.status_code == 403:
-                    error_detail = f"403 Forbidden - URL: {url[:100]}, Referer: {referer}"
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=error_detail
-                )
-            
-            # Stream response
-            return StreamingResponse(
-                iter([response.content]),
-                media_type=response.headers.get("content-type", "image/jpeg"),
-                headers={
-                    "Cache-Control": "public, max-age=86400",
-                    "Access-Control-Allow-Origin": "*"
-                }
-            )
+        cached = await get_image_cache().get_or_fill(
+            url,
+            IMAGE_CACHE_TTL,
+            lambda: fetch_image(url, referer)
+        )
+
+        content_type, _, content = cached.partition(b"\n")
+        
+        # Stream response
+        return StreamingResponse(
+            iter([content]),
+            media_type=content_type.decode(),
+            headers={
+                "Cache-Control": "public, max-age=86400",
+                "Access-Control-Allow-Origin": "*"
+            }
+        )
             
     except httpx.RequestError as e:
         raise HTTPException(status_code=500, detail=f"Network error: {str(e)}")
@@ -397,7 +1793,81 @@ async def proxy_image(
 
 
 # ====================================
-# SHUTDOWN CLEANUP
+# APP FACTORY & SHUTDOWN CLEANUP
 # ====================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+
+    get_client()
+    get_image_client()
+    get_response_cache()
+    get_image_cache()
+
+    if PREWARM:
+        await prewarm()
+
+    tasks = []
+
+    if FEED_BACKGROUND:
+        tasks.append(asyncio.create_task(get_series_feed().run()))
+        tasks.append(asyncio.create_task(watch_feed()))
+
+    if IMAGE_PREWARM_HOSTS > 0:
+        tasks.append(asyncio.create_task(prewarm_image_hosts()))
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+
+    if access_log is not None:
+        access_log.close()
+
+    await close_image_meta()
+    close_compress()
+    await close_clients()
+    await close_caches()
+
+
+access_log: AccessLog | None = None
+
+
+def create_app(transport: httpx.AsyncBaseTransport | None = None) -> FastAPI:
+    """
+    Buat FastAPI app. `transport` bisa diisi fake upstream (lihat fake_upstream.py)
+    untuk benchmark / testing tanpa network.
+    """
+    global upstream_transport, access_log
+
+    upstream_transport = transport
+
+    app = FastAPI(lifespan=lifespan)
+
+    if RATE_LIMIT_ENABLED:
+        app.add_middleware(
+            RateLimitMiddleware,
+            limiter_for=rate_limit_bucket,
+            client_key=client_key,
+        )
+
+    # di luar rate limit supaya 429 ikut tercatat
+    if ACCESS_LOG:
+        access_log = access_log or AccessLog(ACCESS_LOG)
+        app.add_middleware(AccessLogMiddleware, log=access_log)
+
+    # ENABLE PUBLIC CORS (ditambah terakhir = paling luar, jadi 429 juga dapat header CORS)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.include_router(router)
+
+    return app
+
 
+app = create_app()
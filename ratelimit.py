@@ -0,0 +1,161 @@
+"""
+Rate limit token bucket per client (IP atau API key).
+
+`TokenBucket` menyimpan state per key di proses (O(1) per request, key
+idle dibuang lazily). `SharedTokenBucket` menyimpan state di cache backend
+(lihat cache.py) supaya limit berlaku lintas worker; update-nya tidak
+atomik, jadi saat balapan bisa lolos sedikit lebih dari limit.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from cache import CacheBackend
+
+
+class TokenBucket:
+    """`rate` token per detik, maksimal `burst` token per key"""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # waktu sampai bucket kosong terisi penuh lagi; setelah itu state = default
+        self.idle = burst / rate
+        self.buckets: OrderedDict[str, list] = OrderedDict()
+
+    async def take(self, key: str) -> float:
+        """Ambil satu token. Return 0 kalau boleh, atau detik sampai token tersedia."""
+
+        now = time.monotonic()
+
+        entry = self.buckets.get(key)
+
+        if entry is None:
+            entry = self.buckets[key] = [self.burst, now]
+        else:
+            entry[0] = min(self.burst, entry[0] + (now - entry[1]) * self.rate)
+            entry[1] = now
+            self.buckets.move_to_end(key)
+
+        if entry[0] >= 1:
+            entry[0] -= 1
+            wait = 0.0
+        else:
+            wait = (1 - entry[0]) / self.rate
+
+        self._expire(now)
+
+        return wait
+
+    def _expire(self, now: float):
+        # buang beberapa key paling lama idle per request (amortized O(1))
+        for _ in range(2):
+
+            if not self.buckets:
+                return
+
+            key, (tokens, last) = next(iter(self.buckets.items()))
+
+            if now - last < self.idle and len(self.buckets) <= self.max_keys:
+                return
+
+            del self.buckets[key]
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket dengan state di cache backend (dibagi semua worker)"""
+
+    def __init__(self, backend: CacheBackend, name: str, rate: float, burst: float):
+        super().__init__(rate, burst)
+        self.backend = backend
+        self.name = name
+
+    async def take(self, key: str) -> float:
+        now = time.time()
+        state_key = f"rl:{self.name}:{key}"
+
+        try:
+            raw = await self.backend.get(state_key)
+        except Exception:
+            # backend down: jangan blok traffic
+            return 0.0
+
+        tokens = self.burst
+
+        if raw is not None:
+            saved, _, last = raw.partition(b",")
+            tokens = min(self.burst, float(saved) + (now - float(last)) * self.rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate
+
+        try:
+            await self.backend.set(state_key, f"{tokens:.3f},{now:.3f}".encode(), self.idle)
+        except Exception:
+            pass
+
+        return wait
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware. `limiter_for(scope)` memilih bucket (None = tidak dibatasi),
+    `client_key(scope)` menentukan identitas client. Melebihi limit -> 429 + Retry-After.
+    Handshake WebSocket ikut dibatasi: ditolak dengan 429 kalau server mendukung
+    extension websocket.http.response, kalau tidak ditutup dengan 1008.
+    """
+
+    def __init__(self, app, limiter_for: Callable, client_key: Callable):
+        self.app = app
+        self.limiter_for = limiter_for
+        self.client_key = client_key
+
+    async def __call__(self, scope, receive, send):
+
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        limiter = self.limiter_for(scope)
+
+        if limiter is None:
+            return await self.app(scope, receive, send)
+
+        wait = await limiter.take(self.client_key(scope))
+
+        if wait <= 0:
+            return await self.app(scope, receive, send)
+
+        if scope["type"] == "websocket":
+            return await self.reject_websocket(scope, receive, send, wait)
+
+        await self.send_429(send, "http.response", wait)
+
+    async def send_429(self, send, prefix: str, wait: float):
+        body = b'{"detail":"Too many requests"}'
+
+        await send({
+            "type": f"{prefix}.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(math.ceil(wait), 1)).encode()),
+            ],
+        })
+
+        await send({"type": f"{prefix}.body", "body": body})
+
+    async def reject_websocket(self, scope, receive, send, wait: float):
+        # pesan pertama selalu websocket.connect; handshake ditolak sebelum accept
+        await receive()
+
+        if "websocket.http.response" in (scope.get("extensions") or {}):
+            return await self.send_429(send, "websocket.http.response", wait)
+
+        await send({"type": "websocket.close", "code": 1008})
@@ -0,0 +1,39 @@
+"""
+Record ringkas untuk hot path /series.
+
+Setiap item upstream di-decode sekali per halaman: di-clean + proxify,
+lalu disimpan sebagai potongan JSON siap kirim (bytes). Halaman yang
+di-cache tidak lagi menyimpan tree dict generik, dan response list
+dirakit dengan menggabungkan bytes tanpa membangun dict perantara.
+
+Request dengan ?fields= tidak memakai potongan JSON ini: item mentah
+diproyeksikan dulu, baru di-clean + proxify (lihat main.series).
+"""
+
+import json
+from typing import Any, Callable
+
+
+def decode_series_page(body: bytes, encode_item: Callable[[Any], bytes]) -> tuple[bytes, ...]:
+    """
+    Bytes response upstream /series -> tuple JSON per item.
+    `encode_item` dijalankan sekali per item (clean + proxify + render di main.py).
+    """
+
+    return tuple(encode_item(item) for item in series_items(body))
+
+
+def series_items(body: bytes) -> list:
+    """Bytes response upstream /series -> list item mentah"""
+
+    raw = json.loads(body)
+
+    items = raw.get("data") if isinstance(raw, dict) else None
+
+    return items if isinstance(items, list) else []
+
+
+def encode_series_list(envelope: bytes, items) -> bytes:
+    """`envelope` = object JSON tanpa key data; item memakai JSON yang sudah di-encode"""
+
+    return envelope[:-1] + b',"data":[' + b",".join(items) + b"]}"
@@ -0,0 +1,209 @@
+"""
+Replay access log (lihat accesslog.py) ke app in-process dengan fake
+upstream, lalu laporkan throughput, latency percentile dan hit ratio cache.
+
+    ACCESS_LOG=access.log uvicorn main:app     # rekam traffic
+    python replay.py access.log --speedup 10   # replay 10x lebih cepat
+    python replay.py access.log --speedup 0    # secepat mungkin (closed loop)
+
+Tidak ada request yang keluar ke network: upstream dan gambar dilayani
+fake_upstream, dan host /proxy di luar allowlist tidak di-resolve lewat
+DNS (lihat OfflineResolver). Latency upstream disimulasikan lewat
+--upstream-latency / --upstream-tail.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import Counter, defaultdict
+
+# Config main.py dibaca saat import: matikan yang mengganggu replay
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("FEED_BACKGROUND", "false")
+os.environ.setdefault("IMAGE_PREWARM_HOSTS", "0")
+os.environ["ACCESS_LOG"] = ""
+
+import httpx
+
+import fake_upstream
+import main
+from accesslog import parse_line
+from resolver import CachingResolver
+
+
+# Koneksi long-lived tidak bisa di-replay sebagai request biasa
+SKIP_ROUTES = {"/series/stream", "/series/ws"}
+
+
+class OfflineResolver(CachingResolver):
+    """
+    Hostname dianggap publik tanpa getaddrinfo, supaya trace produksi tidak
+    memicu DNS lookup dan tidak jadi 400 saat offline. IP literal tetap
+    divalidasi seperti di produksi.
+    """
+
+    async def _lookup(self, host: str) -> list[str]:
+        # TEST-NET-3: tidak pernah di-connect, gambar dilayani fake upstream
+        return ["203.0.113.1"]
+
+
+def load_trace(path: str, limit: int | None) -> list:
+    entries = []
+
+    with open(path, encoding="utf-8") as f:
+
+        for line in f:
+
+            entry = parse_line(line)
+
+            if entry is None or entry["method"] != "GET" or entry["route"] in SKIP_ROUTES:
+                continue
+
+            entries.append(entry)
+
+            if limit and len(entries) >= limit:
+                break
+
+    entries.sort(key=lambda e: e["ts"])
+
+    return entries
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+async def replay(entries: list, speedup: float, concurrency: int, upstream: fake_upstream.FakeUpstream) -> dict:
+
+    app = main.create_app(transport=fake_upstream.transport(upstream))
+
+    main.resolver = OfflineResolver()
+
+    latencies = defaultdict(list)
+    statuses = Counter()
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async with app.router.lifespan_context(app):
+
+        asgi = httpx.ASGITransport(app=app)
+
+        async with httpx.AsyncClient(transport=asgi, base_url="http://replay", timeout=None) as client:
+
+            async def one(entry):
+                async with slots:
+                    start = time.perf_counter()
+                    response = await client.get(entry["target"])
+                    await response.aread()
+                    latencies[entry["route"]].append((time.perf_counter() - start) * 1000)
+                    statuses[response.status_code] += 1
+
+            started = time.perf_counter()
+            origin = entries[0]["ts"]
+            tasks = []
+
+            for entry in entries:
+
+                # open loop: jaga jarak antar request sesuai trace / speedup
+                if speedup > 0:
+                    delay = started + (entry["ts"] - origin) / speedup - time.perf_counter()
+
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                tasks.append(asyncio.create_task(one(entry)))
+
+            await asyncio.gather(*tasks)
+
+            duration = time.perf_counter() - started
+
+        caches = {
+            "render": main.render_cache,
+            "response": main.response_cache,
+            "image": main.image_cache,
+            "meta": main.meta_cache,
+        }
+
+        hit_ratio = {}
+
+        for name, cache in caches.items():
+
+            if cache is None or not cache.hits + cache.misses:
+                continue
+
+            hit_ratio[name] = round(cache.hits / (cache.hits + cache.misses), 4)
+
+    everything = [v for values in latencies.values() for v in values]
+
+    def summary(values):
+        return {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.50), 2),
+            "p90_ms": round(percentile(values, 0.90), 2),
+            "p99_ms": round(percentile(values, 0.99), 2),
+            "max_ms": round(max(values), 2),
+            "mean_ms": round(statistics.fmean(values), 2),
+        }
+
+    return {
+        "requests": len(everything),
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(everything) / duration, 1) if duration else 0.0,
+        "latency": summary(everything),
+        "routes": {route: summary(values) for route, values in sorted(latencies.items())},
+        "status": dict(sorted(statuses.items())),
+        "cache_hit_ratio": hit_ratio,
+        "upstream_calls": upstream.calls,
+    }
+
+
+def print_report(report: dict):
+    print(f"requests     {report['requests']}")
+    print(f"duration     {report['duration_s']} s")
+    print(f"throughput   {report['throughput_rps']} req/s")
+    print(f"upstream     {report['upstream_calls']} calls")
+    print(f"status       {report['status']}")
+    print(f"cache hits   {report['cache_hit_ratio']}")
+    print()
+    print(f"{'route':<36}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+
+    for route, s in [("(all)", report["latency"]), *report["routes"].items()]:
+        print(f"{route:<36}{s['count']:>8}{s['p50_ms']:>10}{s['p90_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Replay access log against the app with a fake upstream")
+    parser.add_argument("log", help="file access log (ACCESS_LOG)")
+    parser.add_argument("--speedup", type=float, default=1.0, help="kelipatan kecepatan trace; 0 = secepat mungkin")
+    parser.add_argument("--concurrency", type=int, default=256, help="maksimal request bersamaan")
+    parser.add_argument("--limit", type=int, default=None, help="hanya N request pertama")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="latency fake upstream (detik)")
+    parser.add_argument("--upstream-tail", type=float, default=0.01, help="peluang request upstream 10x lebih lambat")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    entries = load_trace(args.log, args.limit)
+
+    if not entries:
+        parser.error("no replayable GET requests in log")
+
+    upstream = fake_upstream.FakeUpstream(args.upstream_latency, args.upstream_tail, any_slug=True)
+
+    report = asyncio.run(replay(entries, args.speedup, args.concurrency, upstream))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main_cli()
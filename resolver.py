@@ -0,0 +1,213 @@
+"""
+DNS resolver dengan cache untuk image proxy.
+
+Hostname di-resolve sekali per TTL (single-flight), dan semua IP hasilnya
+harus alamat publik (bukan private / loopback / link-local / reserved).
+`PinnedNetworkBackend` dipasang di connection pool httpcore (lewat
+`PinnedTransport`, transport httpx) supaya koneksi benar-benar dibuka ke
+IP yang sudah divalidasi: redirect ke host internal dan DNS rebinding
+ikut tertolak, dan lookup DNS tidak diulang per koneksi.
+"""
+
+import asyncio
+import ipaddress
+import socket
+import time
+
+import httpcore
+import httpx
+
+
+class BlockedHostError(Exception):
+    pass
+
+
+def check_ip(ip: str) -> str:
+    if not ipaddress.ip_address(ip.split("%")[0]).is_global:
+        raise BlockedHostError(f"{ip} is not a public address")
+
+    return ip
+
+
+class CachingResolver:
+    """Cache hasil getaddrinfo (yang sudah divalidasi) per hostname"""
+
+    def __init__(self, ttl: float = 300.0, error_ttl: float = 30.0, max_entries: int = 4096):
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.max_entries = max_entries
+        self.entries: dict[str, tuple[float, list | Exception]] = {}
+        self.inflight: dict[str, asyncio.Future] = {}
+
+    async def resolve(self, host: str) -> list[str]:
+        """List IP publik untuk `host`; BlockedHostError / OSError kalau tidak boleh / gagal"""
+
+        host = host.lower().strip("[]")
+
+        try:
+            return [check_ip(str(ipaddress.ip_address(host)))]
+        except ValueError:
+            pass
+
+        entry = self.entries.get(host)
+
+        if entry is not None and entry[0] > time.monotonic():
+            if isinstance(entry[1], Exception):
+                raise entry[1]
+            return entry[1]
+
+        if host in self.inflight:
+            return await asyncio.shield(self.inflight[host])
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[host] = future
+
+        try:
+            ips = await self._lookup(host)
+            self._store(host, self.ttl, ips)
+            future.set_result(ips)
+            return ips
+
+        except (OSError, BlockedHostError) as e:
+            self._store(host, self.error_ttl, e)
+            future.set_exception(e)
+            future.exception()
+            raise
+
+        finally:
+            if not future.done():
+                future.cancel()
+
+            del self.inflight[host]
+
+    async def _lookup(self, host: str) -> list[str]:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+
+        ips = list(dict.fromkeys(info[4][0] for info in infos))
+
+        if not ips:
+            raise OSError(f"No address for {host}")
+
+        # satu IP internal saja sudah cukup untuk menolak host
+        for ip in ips:
+            check_ip(ip)
+
+        return ips
+
+    def _store(self, host: str, ttl: float, value):
+        self.entries.pop(host, None)
+        self.entries[host] = (time.monotonic() + ttl, value)
+
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+
+
+class PinnedNetworkBackend(httpcore.AsyncNetworkBackend):
+    """Network backend httpcore yang connect ke IP hasil CachingResolver"""
+
+    def __init__(self, resolver: CachingResolver, backend: httpcore.AsyncNetworkBackend | None = None):
+        self.resolver = resolver
+        self.backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+
+        try:
+            ips = await self.resolver.resolve(host)
+        except BlockedHostError as e:
+            raise httpcore.ConnectError(f"Blocked host {host}: {e}")
+        except OSError as e:
+            raise httpcore.ConnectError(str(e))
+
+        error = None
+
+        for ip in ips:
+            try:
+                return await self.backend.connect_tcp(ip, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError as e:
+                error = e
+
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        raise httpcore.ConnectError("Unix sockets are not allowed")
+
+    async def sleep(self, seconds: float):
+        await self.backend.sleep(seconds)
+
+
+# ====================================
+# HTTPX TRANSPORT
+# ====================================
+
+# error httpcore yang punya padanan di httpx (nama class sama)
+CORE_ERRORS = (httpcore.TimeoutException, httpcore.NetworkError, httpcore.ProtocolError, httpcore.UnsupportedProtocol)
+
+
+def map_error(exc: Exception) -> Exception:
+    """Exception httpcore -> exception httpx dengan nama yang sama"""
+
+    mapped = getattr(httpx, type(exc).__name__, None)
+
+    if isinstance(mapped, type) and issubclass(mapped, httpx.TransportError):
+        return mapped(str(exc))
+
+    return exc
+
+
+class PinnedStream(httpx.AsyncByteStream):
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self.stream:
+                yield chunk
+        except CORE_ERRORS as e:
+            raise map_error(e) from e
+
+    async def aclose(self):
+        await self.stream.aclose()
+
+
+class PinnedTransport(httpx.AsyncBaseTransport):
+    """Transport httpx di atas `httpcore.AsyncConnectionPool` dengan `PinnedNetworkBackend`"""
+
+    def __init__(self, resolver: CachingResolver, limits: httpx.Limits = httpx.Limits()):
+        self.pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=PinnedNetworkBackend(resolver),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+
+        try:
+            response = await self.pool.handle_async_request(core_request)
+        except CORE_ERRORS as e:
+            raise map_error(e) from e
+
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=PinnedStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self.pool.aclose()
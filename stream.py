@@ -0,0 +1,123 @@
+"""
+Fan-out event rilisan baru ke subscriber SSE / WebSocket.
+
+Satu watcher per worker membaca snapshot feed (lihat feed.py) dan
+mem-publish perubahan ke `Broadcaster`. Event di-serialize sekali lalu
+bytes yang sama dimasukkan ke antrian setiap subscriber, jadi biaya per
+koneksi idle hanya satu objek Subscriber + antrian kosong.
+"""
+
+import asyncio
+
+
+class Event:
+    """Satu event; format SSE dan JSON (untuk WebSocket) dibuat sekali saat publish"""
+
+    __slots__ = ("id", "data", "sse")
+
+    def __init__(self, event_id: str, name: str, data: bytes):
+        self.id = event_id
+        self.data = data
+        self.sse = b"id: %s\nevent: %s\ndata: %s\n\n" % (event_id.encode(), name.encode(), data)
+
+
+class Subscriber:
+    __slots__ = ("queue", "client")
+
+    def __init__(self, size: int, client: str = ""):
+        self.queue = asyncio.Queue(maxsize=size)
+        self.client = client
+
+
+class Broadcaster:
+    """
+    Antrian per subscriber dibatasi `queue_size`. Subscriber yang antriannya
+    penuh (consumer lambat) di-drop: antriannya dikosongkan dan diberi
+    sentinel None supaya stream-nya selesai. Satu client (API key / IP)
+    paling banyak memegang `max_per_client` subscriber sekaligus, supaya
+    tidak bisa menghabiskan `max_subscribers` sendirian.
+    """
+
+    def __init__(self, queue_size: int = 16, max_subscribers: int = 50000, max_per_client: int = 8):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.max_per_client = max_per_client
+        self.subscribers: set[Subscriber] = set()
+        self.clients: dict[str, int] = {}
+        self.dropped = 0
+
+    def subscribe(self, client: str = "") -> Subscriber | None:
+        """None kalau hub penuh atau `client` sudah mencapai batasnya"""
+
+        if len(self.subscribers) >= self.max_subscribers:
+            return None
+
+        if self.clients.get(client, 0) >= self.max_per_client:
+            return None
+
+        sub = Subscriber(self.queue_size, client)
+        self.subscribers.add(sub)
+        self.clients[client] = self.clients.get(client, 0) + 1
+
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        if sub not in self.subscribers:
+            return
+
+        self.subscribers.discard(sub)
+
+        count = self.clients.pop(sub.client, 1) - 1
+
+        if count > 0:
+            self.clients[sub.client] = count
+
+    def publish(self, event: Event):
+        slow = []
+
+        for sub in self.subscribers:
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                slow.append(sub)
+
+        for sub in slow:
+            self.drop(sub)
+
+    def drop(self, sub: Subscriber):
+        self.unsubscribe(sub)
+        self.dropped += 1
+
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+
+        sub.queue.put_nowait(None)
+
+
+async def sse_stream(hub: Broadcaster, sub: Subscriber, backlog: list[Event], heartbeat: float = 15.0):
+    """
+    Generator body text/event-stream. `backlog` berisi event yang terlewat
+    (dari Last-Event-ID) dan dikirim duluan. Komentar ping dikirim tiap
+    `heartbeat` detik supaya proxy tidak menutup koneksi idle.
+    """
+
+    try:
+
+        for event in backlog:
+            yield event.sse
+
+        while True:
+
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+
+            if event is None:
+                return
+
+            yield event.sse
+
+    finally:
+        hub.unsubscribe(sub)